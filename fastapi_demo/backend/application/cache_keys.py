@@ -0,0 +1,16 @@
+from typing import Any, List, Optional, Tuple
+
+
+def normalize_filter(values: Optional[List[Any]]) -> Optional[Tuple[Any, ...]]:
+    """
+    Turn an optional list filter into an order-independent, hashable key part.
+
+    Duplicates are dropped, so filters selecting the same rows give the same key.
+
+    Args:
+        values (Optional[List[Any]]): Filter values, e.g. month or priogrid IDs.
+
+    Returns:
+        Optional[Tuple[Any, ...]]: Sorted unique values, or None for an empty or missing filter.
+    """
+    return tuple(sorted(set(values))) if values else None
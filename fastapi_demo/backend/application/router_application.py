@@ -1,24 +1,66 @@
 import logging
-from fastapi import APIRouter, Query, Path, HTTPException
+import os
+import tempfile
+from fastapi import APIRouter, Query, Path, HTTPException, Response
+from fastapi.responses import JSONResponse, FileResponse
 from typing import List, Optional
 from business.cell.cell_service import CellService
 from business.country.countries_service import CountryService
 from business.month.month_service import MonthService
 from business.query.forecast_query_service import ForecastQueryService
+from business.diff.diff_service import DiffService
+from business.export.export_service import ExportService
 from dataAccess.parquet_reader import ParquetFlatReader
-from application.schemas import ForecastCell, ForecastValues
+from dataAccess.run_registry import RunRegistry
+from dataAccess.sharded_executor import ShardedQueryExecutor
+from application.schemas import ForecastCell, ForecastValues, ExportRequest, ExportStatus
+from application.single_flight import SingleFlight
+from application.cache_keys import normalize_filter
 
 logger = logging.getLogger(__name__)
 
 # Initialize the API router
 router = APIRouter()
 
+# Directory holding the '<run>.parquet' and '<run>_90_hdi.parquet' files
+DATA_PATH = os.getenv("DATA_PATH", "dataAccess")
+
+# Directory where bulk export files are written
+EXPORT_PATH = os.getenv("EXPORT_PATH", os.path.join(tempfile.gettempdir(), "views_exports"))
+
+# Storage type of in-memory metrics ('float64' or 'float32')
+METRIC_PRECISION = os.getenv("METRIC_PRECISION", "float64")
+
+# Number of worker processes for sharded /forecasts execution (0 disables it)
+QUERY_WORKERS = int(os.getenv("QUERY_WORKERS", "0"))
+QUERY_PARTITION = os.getenv("QUERY_PARTITION", "month")
+
 # Instantiate the Parquet data reader and services
-reader = ParquetFlatReader(base_path="dataAccess")
+reader = ParquetFlatReader(base_path=DATA_PATH, metric_precision=METRIC_PRECISION)
 cell_service = CellService(reader)
 month_service = MonthService(reader)
 country_service = CountryService(reader)
-forecast_service = ForecastQueryService(reader)
+query_executor = (
+    ShardedQueryExecutor(reader, workers=QUERY_WORKERS, partition_by=QUERY_PARTITION)
+    if QUERY_WORKERS > 0 else None
+)
+forecast_service = ForecastQueryService(reader, executor=query_executor)
+run_registry = RunRegistry(
+    base_path=DATA_PATH, preloaded={reader.run: reader}, metric_precision=METRIC_PRECISION
+)
+diff_service = DiffService(run_registry)
+export_service = ExportService(run_registry, export_path=EXPORT_PATH)
+
+# Identical concurrent requests share a single computation
+flights = SingleFlight()
+
+
+def shutdown() -> None:
+    """
+    Release resources held by the services: stops the sharded query workers and frees their shared memory.
+    """
+    if query_executor is not None:
+        query_executor.close()
 
 
 @router.get("/{run}/{loa}/{type_of_violence}/forecasts")
@@ -30,6 +72,11 @@ def get_forecasts(
     priogrid_id: Optional[List[int]] = Query(None, description="List of grid cell IDs to filter"),
     country_id: Optional[List[int]] = Query(None, description="List of country IDs to filter"),
     metrics: Optional[List[str]] = Query(None, description="List of metric names to include, e.g. ['MAP', 'HDI_50_lower']"),
+    order_by: Optional[str] = Query(None, description="Metric to rank cells by, highest first within each month, e.g. 'MAP'"),
+    top_k: Optional[int] = Query(None, ge=1, description="Maximum number of cells per month. Requires order_by"),
+    min_value: Optional[float] = Query(None, description="Only return cells whose order_by metric is at least this value. Requires order_by"),
+    layout: str = Query("rows", pattern="^(rows|columnar)$", description="'rows' for one object per cell and month, 'columnar' for one array per field"),
+    dedupe_cells: bool = Query(False, description="With layout=columnar, return lat/lon/country once per cell in a 'cells' table referenced by 'cell_index'"),
 ):
     """
     Retrieve forecast data based on the specified filters.
@@ -38,6 +85,21 @@ def get_forecasts(
     You can filter by month, grid cell (priogrid_id), country, and select specific metrics
     to include in the response. If no metrics are specified, all available metrics are returned.
 
+    With 'order_by', results are ranked by that metric in descending order within each
+    month; 'top_k' and 'min_value' then restrict the ranking, e.g. the 100 highest-risk
+    cells of a month.
+
+    With layout=columnar the response is a single object holding one array per
+    field ('priogrid_id', 'month_id', 'country_id', 'lat', 'lon' and each metric),
+    which avoids repeating key names in every row.
+
+    When sharded execution is enabled (QUERY_WORKERS > 0), unranked queries are
+    filtered and encoded in parallel by worker processes and the encoded parts are
+    returned as-is.
+
+    Identical requests arriving while one is being computed wait for it and
+    receive the same encoded response.
+
     Args:
         run (str): Identifier of the forecast run.
         loa (str): Level of analysis (e.g., 'cell', 'country').
@@ -46,9 +108,14 @@ def get_forecasts(
         priogrid_id (List[int], optional): Filter forecasts by grid cells.
         country_id (List[int], optional): Filter forecasts by countries.
         metrics (List[str], optional): Filter forecasts to include only selected metric names.
+        order_by (str, optional): Metric used to rank the forecasts.
+        top_k (int, optional): Maximum number of forecasts per month when ranking.
+        min_value (float, optional): Minimum value of the ranking metric.
+        layout (str): Response layout, 'rows' (default) or 'columnar'.
+        dedupe_cells (bool): Deduplicate static cell attributes in the columnar layout.
 
     Returns:
-        List[dict]: Each dictionary contains:
+        List[dict]: For the 'rows' layout, each dictionary contains:
             - priogrid_id (int): The ID of the grid cell.
             - month_id (int): The month of the forecast.
             - country_id (int, optional): Country ID if available.
@@ -57,10 +124,26 @@ def get_forecasts(
             - values (dict): Dictionary of selected forecast metrics and their values.
 
     Raises:
-        HTTPException: Returns a 500 error if an unexpected issue occurs during data retrieval.
+        HTTPException: Returns a 400 error for invalid ranking parameters and a 500 error
+            if an unexpected issue occurs during data retrieval.
     """
-    try:
-        results = forecast_service.get_forecasts(month_id, priogrid_id, country_id, metrics)
+    if order_by is not None and order_by not in ParquetFlatReader.METRIC_COLS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric for order_by: {order_by}")
+    if order_by is None and (top_k is not None or min_value is not None):
+        raise HTTPException(status_code=400, detail="top_k and min_value require order_by")
+
+    def encode() -> bytes:
+        if layout == "columnar":
+            return forecast_service.get_forecasts_columnar(
+                month_id, priogrid_id, country_id, metrics, order_by, top_k, min_value, dedupe_cells
+            )
+
+        if forecast_service.supports_encoded(order_by):
+            return forecast_service.get_forecasts_json(month_id, priogrid_id, country_id, metrics)
+
+        results = forecast_service.get_forecasts(
+            month_id, priogrid_id, country_id, metrics, order_by, top_k, min_value
+        )
         converted = []
 
         for r in results:
@@ -77,7 +160,17 @@ def get_forecasts(
             }
             converted.append(cell)
 
-        return converted
+        return JSONResponse(content=converted).body
+
+    key = (
+        "forecasts", run, loa, type_of_violence,
+        normalize_filter(month_id), normalize_filter(priogrid_id),
+        normalize_filter(country_id), normalize_filter(metrics),
+        order_by, top_k, min_value, layout, dedupe_cells,
+    )
+    try:
+        body = flights.do(key, encode)
+        return Response(content=body, media_type="application/json")
 
     except Exception as e:
         logger.error("Failed to retrieve forecasts", exc_info=True)
@@ -125,10 +218,12 @@ def list_cells(run: str, loa: str, type_of_violence: str, country_id: int):
     Raises:
         HTTPException: If retrieving the cell data fails.
     """
-    try:
+    def compute() -> List[int]:
         all_cells = cell_service.get_cells()
-        filtered = [c["priogrid_id"] for c in all_cells if c.get("country_id") == country_id]
-        return filtered
+        return [c["priogrid_id"] for c in all_cells if c.get("country_id") == country_id]
+
+    try:
+        return flights.do(("cells", run, loa, type_of_violence, country_id), compute)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -173,6 +268,160 @@ def list_metrics(run: str, loa: str, type_of_violence: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/{run}/{loa}/{type_of_violence}/diff")
+def get_diff(
+    run: str = Path(..., description="Forecast run to compare, e.g. 'preds_002'"),
+    loa: str = Path(..., description="Level of analysis, e.g. 'cell', 'country'"),
+    type_of_violence: str = Path(..., description="Type of violence forecasted"),
+    base_run: str = Query(..., description="Forecast run the deltas are computed against, e.g. 'preds_001'"),
+    month_id: Optional[List[int]] = Query(None, description="List of month IDs to filter by"),
+    priogrid_id: Optional[List[int]] = Query(None, description="List of grid cell IDs to filter"),
+    country_id: Optional[List[int]] = Query(None, description="List of country IDs to filter"),
+    metrics: Optional[List[str]] = Query(None, description="List of metric names to compare, e.g. ['MAP']"),
+    min_change: Optional[float] = Query(None, ge=0, description="Only return cells where at least one metric changed by this absolute amount"),
+):
+    """
+    Compare two forecast runs cell by cell.
+
+    The runs are joined on (month_id, priogrid_id) and the delta (run - base_run)
+    is returned for each requested metric. Encoded results for a given run pair
+    and filter set are cached in memory, within a fixed byte budget.
+
+    Args:
+        run (str): Forecast run whose values are compared.
+        loa (str): Level of analysis (e.g., 'cell', 'country').
+        type_of_violence (str): Type of violence being forecasted.
+        base_run (str): Forecast run used as the baseline.
+        month_id (List[int], optional): Filter by specific months.
+        priogrid_id (List[int], optional): Filter by grid cells.
+        country_id (List[int], optional): Filter by countries.
+        metrics (List[str], optional): Metrics to compare. Defaults to all.
+        min_change (float, optional): Minimum absolute delta for a cell to be returned.
+
+    Returns:
+        List[dict]: Each dictionary contains priogrid_id, month_id, country_id, lat, lon
+        and a 'deltas' dictionary of metric name to change.
+
+    Raises:
+        HTTPException: 404 if a run does not exist, 400 for unknown metrics, 500 otherwise.
+    """
+    try:
+        body = diff_service.get_diff(run, base_run, month_id, priogrid_id, country_id, metrics, min_change)
+        return Response(content=body, media_type="application/json")
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Run not found: {e.args[0]}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        logger.error("Failed to compute diff", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/exports", response_model=ExportStatus, status_code=202)
+def create_export(request: ExportRequest):
+    """
+    Start a bulk export of forecast data to a file.
+
+    The export runs in the background; poll GET /exports/{export_id} for progress and
+    download the file from GET /exports/{export_id}/download once it is done. Identical
+    requests for the same dataset version return the existing job and file.
+
+    Args:
+        request (ExportRequest): Run, output format, filters and metrics to export.
+
+    Returns:
+        ExportStatus: Status of the new or existing export job.
+
+    Raises:
+        HTTPException: 404 if the run does not exist, 400 for an unsupported format or metric.
+    """
+    try:
+        return export_service.submit(
+            request.run, request.format, request.month_id, request.priogrid_id, request.country_id, request.metrics
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Run not found: {e.args[0]}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        logger.error("Failed to start export", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/exports/{export_id}", response_model=ExportStatus)
+def get_export(export_id: str):
+    """
+    Report the status and progress of an export job.
+
+    Args:
+        export_id (str): Identifier returned when the export was created.
+
+    Returns:
+        ExportStatus: Status, rows written and progress of the job.
+
+    Raises:
+        HTTPException: 404 if the export does not exist.
+    """
+    try:
+        return export_service.get_status(export_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Export not found: {export_id}")
+
+
+@router.get("/exports/{export_id}/download")
+def download_export(export_id: str):
+    """
+    Serve the file of a finished export. Supports HTTP Range requests for resumable downloads.
+
+    Args:
+        export_id (str): Identifier returned when the export was created.
+
+    Returns:
+        FileResponse: The exported file.
+
+    Raises:
+        HTTPException: 404 if the export does not exist, 409 if it has not finished.
+    """
+    try:
+        path = export_service.get_file(export_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Export not found: {export_id}")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    media_types = {".parquet": "application/vnd.apache.parquet", ".csv": "text/csv", ".ndjson": "application/x-ndjson"}
+    return FileResponse(path, media_type=media_types.get(path.suffix), filename=path.name)
+
+
+@router.get("/memory")
+def memory_usage():
+    """
+    Report the estimated memory usage of every loaded forecast run.
+
+    Returns:
+        dict: 'total_bytes' across runs and a 'runs' list with, per run, the row count,
+        frame and rank index sizes and a per-column breakdown of dtype and bytes.
+
+    Raises:
+        HTTPException: If the report cannot be computed.
+    """
+    try:
+        runs = [r.memory_report() for r in run_registry.loaded_runs().values()]
+        return {"total_bytes": sum(r["total_bytes"] for r in runs), "runs": runs}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/coalescing")
+def coalescing_stats():
+    """
+    Report how many requests were served by an identical in-flight request.
+
+    Returns:
+        dict: 'executed' computations, 'coalesced' requests and currently 'in_flight' keys.
+    """
+    return flights.stats()
+
+
 @router.get("/")
 def root():
     """
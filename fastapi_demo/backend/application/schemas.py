@@ -57,4 +57,48 @@ class ForecastCell(BaseModel):
     country_id: Optional[int]
     lat: Optional[float]
     lon: Optional[float]
-    values: ForecastValues
\ No newline at end of file
+    values: ForecastValues
+
+class ExportRequest(BaseModel):
+    """
+    Parameters of a bulk export job.
+
+    Args:
+        run (str): Forecast run to export (e.g., 'preds_001').
+        format (str): Output file format: 'parquet', 'csv' or 'ndjson'.
+        month_id (Optional[List[int]]): Months to include. All months if omitted.
+        priogrid_id (Optional[List[int]]): Grid cells to include. All cells if omitted.
+        country_id (Optional[List[int]]): Countries to include. All countries if omitted.
+        metrics (Optional[List[str]]): Metrics to include. All metrics if omitted.
+    """
+    run: str = "preds_001"
+    format: str = "parquet"
+    month_id: Optional[List[int]] = None
+    priogrid_id: Optional[List[int]] = None
+    country_id: Optional[List[int]] = None
+    metrics: Optional[List[str]] = None
+
+class ExportStatus(BaseModel):
+    """
+    Status and progress of a bulk export job.
+
+    Args:
+        export_id (str): Job identifier, stable for identical exports of the same dataset version.
+        status (str): 'pending', 'running', 'done' or 'failed'.
+        format (str): Output file format.
+        run (str): Exported forecast run.
+        rows_total (Optional[int]): Number of rows to write, once known.
+        rows_written (int): Number of rows written so far.
+        progress (float): Fraction of rows written, from 0 to 1.
+        size_bytes (Optional[int]): Size of the finished file.
+        error (Optional[str]): Failure reason, if the job failed.
+    """
+    export_id: str
+    status: str
+    format: str
+    run: str
+    rows_total: Optional[int]
+    rows_written: int
+    progress: float
+    size_bytes: Optional[int]
+    error: Optional[str]
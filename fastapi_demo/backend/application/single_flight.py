@@ -0,0 +1,89 @@
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class _Call:
+    """
+    State of one in-flight computation shared by all callers with the same key.
+    """
+
+    def __init__(self):
+        self.done = Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Deduplicates identical concurrent computations.
+
+    The first caller for a key runs the function; callers arriving with the same
+    key while it is still running wait for it and receive the same result (or
+    the same exception). Nothing is kept once the computation finishes, so this
+    is not a cache: a later call with the same key computes again.
+
+    Attributes:
+        executed (int): Number of computations actually run.
+        coalesced (int): Number of calls served by another caller's computation.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn for key, or wait for the identical call already in flight.
+
+        Args:
+            key (Hashable): Normalized identity of the computation.
+            fn (Callable[[], Any]): Function computing the result.
+
+        Returns:
+            Any: The result of fn, shared between all coalesced callers.
+
+        Raises:
+            BaseException: Whatever fn raised, re-raised in every coalesced caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the coalescing counters.
+
+        Returns:
+            Dict[str, int]: 'executed', 'coalesced' and 'in_flight' counts.
+        """
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
@@ -0,0 +1,144 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import List, Any, Optional, Tuple
+import polars as pl
+from dataAccess.run_registry import RunRegistry
+from dataAccess.parquet_reader import ParquetFlatReader
+from business.diff.interface_diff_service import IDiffService
+from application.cache_keys import normalize_filter
+
+class DiffService(IDiffService):
+    """
+    Service class comparing two forecast runs.
+
+    Both runs are filtered and turned into metric frames by their readers, then
+    joined on (month_id, priogrid_id) in Polars and encoded to JSON by Polars.
+    The encoded results are memoized per normalized query, since loaded runs do
+    not change, in an LRU cache bounded by total size in bytes.
+
+    Attributes:
+        registry (RunRegistry): Registry used to resolve run names to readers.
+        cache_bytes (int): Maximum total size of the cached results.
+    """
+
+    KEYS = ["month_id", "priogrid_id"]
+
+    def __init__(self, registry: RunRegistry, cache_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize DiffService with a run registry.
+
+        Args:
+            registry (RunRegistry): Registry of the loaded forecast runs.
+            cache_bytes (int): Maximum total size of the encoded diffs kept in memory.
+                Results larger than this are not cached.
+        """
+        self.registry = registry
+        self.cache_bytes = cache_bytes
+        self._cache: "OrderedDict[Tuple[Any, ...], bytes]" = OrderedDict()
+        self._cache_size = 0
+        self._lock = Lock()
+        self.cache_hits = 0
+
+    def get_diff(
+        self,
+        run: str,
+        base_run: str,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+        metrics: Optional[List[str]] = None,
+        min_change: Optional[float] = None
+    ) -> bytes:
+        """
+        Compute per-cell metric deltas (run minus base_run) between two forecast runs.
+
+        Args:
+            run (str): Run whose values are compared.
+            base_run (str): Run the deltas are computed against.
+            month_ids (Optional[List[int]]): List of month IDs to filter by. Defaults to None.
+            priogrid_ids (Optional[List[int]]): List of priogrid IDs to filter by. Defaults to None.
+            country_ids (Optional[List[int]]): List of country IDs to filter by. Defaults to None.
+            metrics (Optional[List[str]]): List of metric names to compare. Defaults to None (all).
+            min_change (Optional[float]): Only keep cells where at least one absolute delta reaches this value.
+
+        Returns:
+            bytes: JSON array with one record per cell and month present in both runs, each
+            with a 'deltas' object keyed by metric name.
+
+        Raises:
+            KeyError: If one of the runs does not exist.
+            ValueError: If an unknown metric is requested.
+        """
+        if metrics:
+            unknown = [m for m in metrics if m not in ParquetFlatReader.METRIC_COLS]
+            if unknown:
+                raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+        metric_cols = tuple(m for m in ParquetFlatReader.METRIC_COLS if not metrics or m in metrics)
+        key = (
+            run,
+            base_run,
+            normalize_filter(month_ids),
+            normalize_filter(priogrid_ids),
+            normalize_filter(country_ids),
+            metric_cols,
+            min_change,
+        )
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return self._cache[key]
+
+        encoded = self._compute_diff(*key)
+        self._store(key, encoded)
+        return encoded
+
+    def _store(self, key: Tuple[Any, ...], encoded: bytes) -> None:
+        """
+        Add a result to the cache, evicting the least recently used entries to stay within cache_bytes.
+        """
+        if len(encoded) > self.cache_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = encoded
+            self._cache_size += len(encoded)
+            while self._cache_size > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_size -= len(evicted)
+
+    def _compute_diff(
+        self,
+        run: str,
+        base_run: str,
+        month_ids: Optional[Tuple[int, ...]],
+        priogrid_ids: Optional[Tuple[int, ...]],
+        country_ids: Optional[Tuple[int, ...]],
+        metrics: Tuple[str, ...],
+        min_change: Optional[float],
+    ) -> bytes:
+        current_reader = self.registry.get(run)
+        base_reader = self.registry.get(base_run)
+        filters = (
+            list(month_ids) if month_ids else None,
+            list(priogrid_ids) if priogrid_ids else None,
+            list(country_ids) if country_ids else None,
+        )
+        metric_list = list(metrics)
+
+        current = current_reader.metric_frame(*filters, metric_list)
+        base = base_reader.metric_frame(*filters, metric_list).select(self.KEYS + metric_list)
+
+        joined = current.join(base, on=self.KEYS, how="inner", suffix="_base")
+        joined = joined.with_columns([
+            (pl.col(m) - pl.col(f"{m}_base")).alias(m) for m in metric_list
+        ])
+
+        if min_change is not None and metric_list:
+            joined = joined.filter(pl.any_horizontal([pl.col(m).abs() >= min_change for m in metric_list]))
+
+        joined = joined.sort(self.KEYS)
+        record_cols = [c for c in ParquetFlatReader.RECORD_COLS if c in joined.columns]
+        encoded = joined.select(record_cols + [pl.struct(metric_list).alias("deltas")]).write_json()
+        return encoded.encode()
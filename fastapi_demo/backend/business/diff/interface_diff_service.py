@@ -0,0 +1,37 @@
+from typing import List, Optional
+from abc import ABC, abstractmethod
+
+class IDiffService(ABC):
+    """
+    Interface for run-to-run diff services.
+
+    Defines a method to compare the forecasts of two runs cell by cell.
+    """
+
+    @abstractmethod
+    def get_diff(
+        self,
+        run: str,
+        base_run: str,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+        metrics: Optional[List[str]] = None,
+        min_change: Optional[float] = None
+    ) -> bytes:
+        """
+        Compute per-cell metric deltas between two forecast runs.
+
+        Args:
+            run (str): Run whose values are compared.
+            base_run (str): Run the deltas are computed against.
+            month_ids (Optional[List[int]]): List of month IDs to filter by. Defaults to None.
+            priogrid_ids (Optional[List[int]]): List of priogrid IDs to filter by. Defaults to None.
+            country_ids (Optional[List[int]]): List of country IDs to filter by. Defaults to None.
+            metrics (Optional[List[str]]): List of metric names to compare. Defaults to None (all).
+            min_change (Optional[float]): Only keep cells where at least one absolute delta reaches this value.
+
+        Returns:
+            bytes: JSON array with one record per (month_id, priogrid_id) present in both runs.
+        """
+        pass
@@ -0,0 +1,418 @@
+import hashlib
+import json
+import logging
+import os
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import List, Dict, Any, Iterator, Optional, Set
+import polars as pl
+from polars.io.plugins import register_io_source
+from dataAccess.parquet_reader import ParquetFlatReader
+from dataAccess.run_registry import RunRegistry
+from business.export.interface_export_service import IExportService
+
+logger = logging.getLogger(__name__)
+
+# Tokens of the export locks held by this process
+_HELD_LOCKS: Set[str] = set()
+
+
+def _process_start(pid: int) -> Optional[str]:
+    """
+    Return the start time of a process, which tells it apart from a later process reusing its pid.
+
+    Reads /proc, so it only works on Linux; returns None elsewhere or if the process does not exist.
+    """
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    # Field 22; the command name may contain spaces, so count from the closing parenthesis
+    return stat.rsplit(")", 1)[1].split()[19]
+
+
+class ExportJob:
+    """
+    State of one export job, as recorded in its status file.
+
+    Attributes:
+        export_id (str): Job identifier, derived from the export spec and dataset version.
+        spec (Dict[str, Any]): Normalized export parameters.
+        path (Path): Final location of the exported file.
+        status (str): 'pending', 'running', 'done' or 'failed'.
+        rows_total (Optional[int]): Number of rows to write, known once the job starts.
+        rows_written (int): Number of rows written so far.
+        error (Optional[str]): Failure reason, if any.
+    """
+
+    def __init__(self, export_id: str, spec: Dict[str, Any], path: Path):
+        self.export_id = export_id
+        self.spec = spec
+        self.path = path
+        self.status = "pending"
+        self.rows_total: Optional[int] = None
+        self.rows_written = 0
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.status == "done":
+            progress = 1.0
+        elif self.rows_total:
+            progress = self.rows_written / self.rows_total
+        else:
+            progress = 0.0
+        return {
+            "export_id": self.export_id,
+            "status": self.status,
+            "format": self.spec["format"],
+            "run": self.spec["run"],
+            "rows_total": self.rows_total,
+            "rows_written": self.rows_written,
+            "progress": progress,
+            "size_bytes": self.path.stat().st_size if self.status == "done" else None,
+            "error": self.error,
+        }
+
+
+class ExportService(IExportService):
+    """
+    Service class running bulk exports in background threads.
+
+    Each job streams a run from its reader into a local file, month by month and
+    in batches, so progress can be reported while it runs. The job id is a
+    hash of the normalized export spec and the run's dataset version, so an
+    identical export is served from the existing job or file.
+
+    Job state is kept in the export directory rather than in memory, so every
+    worker process sharing the directory, and a restarted process, sees the same
+    jobs. For a job id the directory holds:
+        <id>.json            status and progress, replaced atomically on each update
+        <id>.lock            created exclusively by the process running the job, naming
+                             its pid, start time and a token for this claim
+        <id>.<ext>           the finished file, renamed into place when complete
+        <id>.<ext>.*.part    the file being written, unique per writer
+
+    Attributes:
+        FORMATS (Dict[str, str]): File extension for each supported format.
+        registry (RunRegistry): Registry used to resolve run names to readers.
+        export_path (Path): Directory the export files are written to.
+    """
+
+    FORMATS = {"parquet": "parquet", "csv": "csv", "ndjson": "ndjson"}
+
+    def __init__(self, registry: RunRegistry, export_path: str, workers: int = 2, batch_size: int = 100_000):
+        """
+        Initialize ExportService.
+
+        Args:
+            registry (RunRegistry): Registry of the loaded forecast runs.
+            export_path (str): Directory for export files. Created if missing.
+            workers (int): Number of exports running at the same time.
+            batch_size (int): Number of rows written per batch.
+        """
+        self.registry = registry
+        self.export_path = Path(export_path)
+        self.export_path.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        # Jobs started by this process, to wait for them
+        self._futures: Dict[str, Future] = {}
+        self._lock = Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+
+    def submit(
+        self,
+        run: str,
+        file_format: str,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+        metrics: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Start an export job, or return the existing job for an identical export.
+
+        Args:
+            run (str): Forecast run to export.
+            file_format (str): 'parquet', 'csv' or 'ndjson'.
+            month_ids (Optional[List[int]]): List of month IDs to filter by. Defaults to None.
+            priogrid_ids (Optional[List[int]]): List of priogrid IDs to filter by. Defaults to None.
+            country_ids (Optional[List[int]]): List of country IDs to filter by. Defaults to None.
+            metrics (Optional[List[str]]): List of metric names to include. Defaults to None (all).
+
+        Returns:
+            Dict[str, Any]: Status of the job.
+
+        Raises:
+            KeyError: If the run does not exist.
+            ValueError: If the format or a metric is not supported.
+        """
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Unsupported export format: {file_format}")
+        if metrics:
+            unknown = [m for m in metrics if m not in ParquetFlatReader.METRIC_COLS]
+            if unknown:
+                raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+
+        reader = self.registry.get(run)
+        spec = {
+            "run": run,
+            "version": reader.version,
+            "format": file_format,
+            "month_id": sorted(set(month_ids)) if month_ids else None,
+            "priogrid_id": sorted(set(priogrid_ids)) if priogrid_ids else None,
+            "country_id": sorted(set(country_ids)) if country_ids else None,
+            "metrics": [m for m in ParquetFlatReader.METRIC_COLS if not metrics or m in metrics],
+        }
+        export_id = hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+        job = ExportJob(export_id, spec, self.export_path / f"{export_id}.{self.FORMATS[file_format]}")
+
+        with self._lock:
+            existing = self._load(export_id)
+            if existing is not None and existing.status != "failed":
+                return existing.to_dict()
+            token = self._claim(export_id)
+            if token is None:
+                # Another process started the same export in the meantime
+                return (self._load(export_id) or job).to_dict()
+            existing = self._load(export_id)
+            if existing is not None and existing.status == "done":
+                # Finished by another process between the check and the claim
+                self._release(export_id, token)
+                return existing.to_dict()
+            self._save(job)
+            self._futures[export_id] = self._pool.submit(self._run, job, reader, token)
+            return job.to_dict()
+
+    def get_status(self, export_id: str) -> Dict[str, Any]:
+        """
+        Return the status and progress of an export job.
+
+        Raises:
+            KeyError: If the job does not exist.
+        """
+        job = self._load(export_id)
+        if job is None:
+            raise KeyError(export_id)
+        return job.to_dict()
+
+    def get_file(self, export_id: str) -> Path:
+        """
+        Return the path of a finished export file.
+
+        Raises:
+            KeyError: If the job does not exist.
+            RuntimeError: If the job has not finished successfully.
+        """
+        job = self._load(export_id)
+        if job is None:
+            raise KeyError(export_id)
+        if job.status != "done":
+            raise RuntimeError(f"Export {export_id} is {job.status}")
+        return job.path
+
+    def _status_path(self, export_id: str) -> Path:
+        return self.export_path / f"{export_id}.json"
+
+    def _lock_path(self, export_id: str) -> Path:
+        return self.export_path / f"{export_id}.lock"
+
+    def _save(self, job: ExportJob) -> None:
+        """
+        Write the status file of a job, atomically so readers never see a partial file.
+        """
+        state = {
+            "export_id": job.export_id,
+            "spec": job.spec,
+            "status": job.status,
+            "rows_total": job.rows_total,
+            "rows_written": job.rows_written,
+            "error": job.error,
+        }
+        path = self._status_path(job.export_id)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(json.dumps(state))
+        os.replace(tmp_path, path)
+
+    def _load(self, export_id: str) -> Optional[ExportJob]:
+        """
+        Read the state of a job from its status file, or return None if there is none.
+
+        A finished job whose file is gone, or an unfinished job whose owner no
+        longer holds the lock, is reported as failed so it can be submitted again.
+        """
+        # Ids come from request paths; anything but a hex digest must not reach the filesystem
+        if not export_id.isalnum():
+            return None
+        try:
+            state = json.loads(self._status_path(export_id).read_text())
+            spec = state["spec"]
+            job = ExportJob(export_id, spec, self.export_path / f"{export_id}.{self.FORMATS[spec['format']]}")
+            job.status = state["status"]
+            job.rows_total = state["rows_total"]
+            job.rows_written = state["rows_written"]
+            job.error = state["error"]
+        except (OSError, ValueError, KeyError, TypeError):
+            # Missing or unreadable, e.g. written by an older version; the job is run again
+            return None
+
+        owner = self._read_lock(self._lock_path(export_id))
+        if job.status == "done" and not job.path.exists():
+            job.status, job.error = "failed", "Export file was removed"
+        elif job.status in ("pending", "running") and not self._lock_live(owner):
+            job.status, job.error = "failed", "Export was interrupted"
+        return job
+
+    def _claim(self, export_id: str) -> Optional[str]:
+        """
+        Create the lock file of a job and return its token, or None if a live owner holds it.
+
+        A stale lock, left by a process that no longer exists or never finished
+        writing it, is taken over.
+        """
+        path = self._lock_path(export_id)
+        token = uuid.uuid4().hex
+        tmp_path = path.with_name(f"{path.name}.{token}.tmp")
+        tmp_path.write_text(json.dumps({"pid": os.getpid(), "started": _process_start(os.getpid()), "token": token}))
+        # Registered first, so no thread of this process sees its own fresh lock as stale
+        _HELD_LOCKS.add(token)
+        try:
+            for _ in range(2):
+                try:
+                    # Unlike open(..., "x"), link() creates the lock with its contents in one step
+                    os.link(tmp_path, path)
+                    return token
+                except FileExistsError:
+                    owner = self._read_lock(path)
+                    if self._lock_live(owner):
+                        break
+                    self._break_lock(path, owner)
+            _HELD_LOCKS.discard(token)
+            return None
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _break_lock(self, path: Path, owner: Optional[Dict[str, Any]]) -> None:
+        """
+        Remove a stale lock, unless another process has replaced it since it was read.
+
+        The lock is moved aside atomically and only discarded if it is the one found stale;
+        otherwise it is put back.
+        """
+        stale_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.stale")
+        try:
+            os.replace(path, stale_path)
+        except FileNotFoundError:
+            return
+        if self._read_lock(stale_path) != owner:
+            try:
+                os.link(stale_path, path)
+            except FileExistsError:
+                pass
+        stale_path.unlink(missing_ok=True)
+
+    def _release(self, export_id: str, token: str) -> None:
+        """
+        Delete the lock file of a job if it still carries the given token.
+        """
+        path = self._lock_path(export_id)
+        owner = self._read_lock(path)
+        if owner is not None and owner.get("token") == token:
+            path.unlink(missing_ok=True)
+        _HELD_LOCKS.discard(token)
+
+    @staticmethod
+    def _read_lock(path: Path) -> Optional[Dict[str, Any]]:
+        """
+        Return the contents of a lock file, {} if it is unreadable, or None if it does not exist.
+        """
+        try:
+            owner = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            return {}
+        return owner if isinstance(owner, dict) else {}
+
+    @staticmethod
+    def _lock_live(owner: Optional[Dict[str, Any]]) -> bool:
+        """
+        Return whether a lock read by _read_lock is held by a running export.
+
+        A lock naming this process is live only while this process holds its token,
+        and a lock naming another pid only while that process, with the same start
+        time, still exists.
+        """
+        if not owner or not isinstance(owner.get("pid"), int):
+            return False
+        pid = owner["pid"]
+        if pid == os.getpid():
+            return owner.get("token") in _HELD_LOCKS
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            # The process exists but belongs to another user
+            pass
+        started, current = owner.get("started"), _process_start(pid)
+        return started is None or current is None or started == current
+
+    def _run(self, job: ExportJob, reader: ParquetFlatReader, token: str) -> None:
+        """
+        Stream the export file of a job one month at a time, recording its progress.
+
+        Each month is filtered and computed by the reader and handed in batches to a
+        Polars sink, so the full result is never held in memory at once.
+        """
+        job.status = "running"
+        # Unique per writer, so a stale or concurrent writer never shares the file
+        part_path = job.path.with_name(f"{job.path.name}.{os.getpid()}.{uuid.uuid4().hex}.part")
+        spec = job.spec
+
+        def month_frame(month_ids: Optional[List[int]]) -> pl.DataFrame:
+            df = reader.metric_frame(month_ids, spec["priogrid_id"], spec["country_id"], spec["metrics"])
+            return df.select([c for c in ParquetFlatReader.RECORD_COLS if c in df.columns] + spec["metrics"])
+
+        try:
+            job.rows_total = reader.count(spec["month_id"], spec["priogrid_id"], spec["country_id"])
+            self._save(job)
+            chunks = [[m] for m in (spec["month_id"] or reader.list_months())] or [None]
+            # The first month is computed up front to give the sink its schema
+            pending = [month_frame(chunks[0])]
+            schema = pending[0].schema
+
+            def batches(
+                with_columns: Optional[List[str]],
+                predicate: Optional[pl.Expr],
+                n_rows: Optional[int],
+                batch_size: Optional[int],
+            ) -> Iterator[pl.DataFrame]:
+                for chunk in chunks:
+                    df = pending.pop() if pending else month_frame(chunk)
+                    for batch in df.iter_slices(self.batch_size):
+                        yield batch.select(with_columns) if with_columns else batch
+                        # Resumed once the sink has taken the batch
+                        job.rows_written += batch.height
+                        self._save(job)
+
+            source = register_io_source(batches, schema=schema)
+            if spec["format"] == "parquet":
+                source.sink_parquet(part_path, row_group_size=self.batch_size)
+            elif spec["format"] == "csv":
+                source.sink_csv(part_path)
+            else:
+                source.sink_ndjson(part_path)
+
+            os.replace(part_path, job.path)
+            job.status = "done"
+            self._save(job)
+        except Exception as e:
+            logger.error("Export %s failed", job.export_id, exc_info=True)
+            job.status = "failed"
+            job.error = str(e)
+            part_path.unlink(missing_ok=True)
+            self._save(job)
+        finally:
+            self._release(job.export_id, token)
@@ -0,0 +1,63 @@
+from typing import List, Dict, Any, Optional
+from pathlib import Path
+from abc import ABC, abstractmethod
+
+class IExportService(ABC):
+    """
+    Interface for bulk export services.
+
+    Defines methods to start export jobs, follow their progress and locate
+    the files they produce.
+    """
+
+    @abstractmethod
+    def submit(
+        self,
+        run: str,
+        file_format: str,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+        metrics: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Start an export job, or return the existing job for an identical export.
+
+        Args:
+            run (str): Forecast run to export.
+            file_format (str): Output format, e.g. 'parquet', 'csv' or 'ndjson'.
+            month_ids (Optional[List[int]]): List of month IDs to filter by. Defaults to None.
+            priogrid_ids (Optional[List[int]]): List of priogrid IDs to filter by. Defaults to None.
+            country_ids (Optional[List[int]]): List of country IDs to filter by. Defaults to None.
+            metrics (Optional[List[str]]): List of metric names to include. Defaults to None (all).
+
+        Returns:
+            Dict[str, Any]: Status of the job.
+        """
+        pass
+
+    @abstractmethod
+    def get_status(self, export_id: str) -> Dict[str, Any]:
+        """
+        Return the status and progress of an export job.
+
+        Args:
+            export_id (str): Identifier returned by submit.
+
+        Returns:
+            Dict[str, Any]: Status of the job.
+        """
+        pass
+
+    @abstractmethod
+    def get_file(self, export_id: str) -> Path:
+        """
+        Return the path of a finished export file.
+
+        Args:
+            export_id (str): Identifier returned by submit.
+
+        Returns:
+            Path: Location of the exported file.
+        """
+        pass
@@ -1,29 +1,41 @@
 from typing import List, Dict, Any, Optional
+import polars as pl
 from dataAccess.interface_parquet_reader import IParquetReader
+from dataAccess.parquet_reader import ParquetFlatReader
+from dataAccess.sharded_executor import ShardedQueryExecutor
 from business.query.interface_query_service import IForecastQueryService
 
+# Per-cell attributes that do not change between months
+CELL_COLS = ["priogrid_id", "country_id", "lat", "lon"]
+
 class ForecastQueryService(IForecastQueryService):
     """
     Service class for querying forecast data with flexible filters.
 
     Attributes:
         repository (IParquetReader): Repository interface to access forecast data.
+        executor (Optional[ShardedQueryExecutor]): Process pool used for sharded queries, if enabled.
     """
-    def __init__(self, repository: IParquetReader):
+    def __init__(self, repository: IParquetReader, executor: Optional[ShardedQueryExecutor] = None):
         """
         Initialize ForecastQueryService with a repository.
 
         Args:
             repository (IParquetReader): Instance implementing forecast data access.
+            executor (Optional[ShardedQueryExecutor]): Sharded executor for encoded queries. Defaults to None.
         """
         self.repository = repository
+        self.executor = executor
 
     def get_forecasts(
         self,
         month_ids: Optional[List[int]] = None,
         priogrid_ids: Optional[List[int]] = None,
         country_ids: Optional[List[int]] = None,
-        metrics: Optional[List[str]] = None
+        metrics: Optional[List[str]] = None,
+        order_by: Optional[str] = None,
+        top_k: Optional[int] = None,
+        min_value: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """
         Query forecasts filtered by optional month IDs, priogrid IDs, country IDs, and metrics.
@@ -33,8 +45,106 @@ class ForecastQueryService(IForecastQueryService):
             priogrid_ids (Optional[List[int]]): List of spatial grid cell IDs to filter forecasts. Defaults to None.
             country_ids (Optional[List[int]]): List of country IDs to filter forecasts. Defaults to None.
             metrics (Optional[List[str]]): List of metric names to include in the results. Defaults to None.
+            order_by (Optional[str]): Metric to rank forecasts by, descending within each month. Defaults to None.
+            top_k (Optional[int]): Maximum number of forecasts per month when ranking. Defaults to None.
+            min_value (Optional[float]): Minimum value of the ranking metric. Defaults to None.
 
         Returns:
             List[Dict[str, Any]]: List of forecast records matching the filters, each represented as a dictionary.
         """
-        return self.repository.query(month_ids, priogrid_ids, country_ids, metrics)
\ No newline at end of file
+        return self.repository.query(month_ids, priogrid_ids, country_ids, metrics, order_by, top_k, min_value)
+
+    def supports_encoded(self, order_by: Optional[str] = None) -> bool:
+        """
+        Tell whether get_forecasts_json can serve a query: a sharded executor is configured
+        and the query is not ranked, since ranking runs on the in-process indexes.
+
+        Args:
+            order_by (Optional[str]): Metric the query is ranked by, if any. Defaults to None.
+
+        Returns:
+            bool: True if the query can be sent to the sharded executor.
+        """
+        return self.executor is not None and order_by is None
+
+    def get_forecasts_json(
+        self,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+        metrics: Optional[List[str]] = None
+    ) -> bytes:
+        """
+        Query forecasts on the sharded executor and return the JSON-encoded response body.
+
+        Args:
+            month_ids (Optional[List[int]]): List of month identifiers to filter forecasts. Defaults to None.
+            priogrid_ids (Optional[List[int]]): List of spatial grid cell IDs to filter forecasts. Defaults to None.
+            country_ids (Optional[List[int]]): List of country IDs to filter forecasts. Defaults to None.
+            metrics (Optional[List[str]]): List of metric names to include in the results. Defaults to None.
+
+        Returns:
+            bytes: JSON array of forecast records.
+
+        Raises:
+            RuntimeError: If no sharded executor is configured.
+        """
+        if self.executor is None:
+            raise RuntimeError("Sharded execution is not enabled")
+        return self.executor.query_json(month_ids, priogrid_ids, country_ids, metrics)
+
+    def get_forecasts_columnar(
+        self,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+        metrics: Optional[List[str]] = None,
+        order_by: Optional[str] = None,
+        top_k: Optional[int] = None,
+        min_value: Optional[float] = None,
+        dedupe_cells: bool = False
+    ) -> bytes:
+        """
+        Query forecasts and encode them as one JSON array per field.
+
+        The object has the keys 'priogrid_id', 'month_id', 'country_id', 'lat', 'lon'
+        and one key per selected metric. With 'dedupe_cells', the static cell attributes
+        are moved to a 'cells' table and each row refers to it through 'cell_index'.
+        Encoding is done by Polars, without building per-row dictionaries. Metrics stored
+        as Float32 are widened to Float64 first, so values match the rows layout exactly.
+
+        Args:
+            month_ids (Optional[List[int]]): List of month identifiers to filter forecasts. Defaults to None.
+            priogrid_ids (Optional[List[int]]): List of spatial grid cell IDs to filter forecasts. Defaults to None.
+            country_ids (Optional[List[int]]): List of country IDs to filter forecasts. Defaults to None.
+            metrics (Optional[List[str]]): List of metric names to include in the results. Defaults to None.
+            order_by (Optional[str]): Metric to rank forecasts by, descending within each month. Defaults to None.
+            top_k (Optional[int]): Maximum number of forecasts per month when ranking. Defaults to None.
+            min_value (Optional[float]): Minimum value of the ranking metric. Defaults to None.
+            dedupe_cells (bool): Store cell attributes once in a side table. Defaults to False.
+
+        Returns:
+            bytes: JSON object of column arrays.
+        """
+        df = self.repository.metric_frame(
+            month_ids, priogrid_ids, country_ids, metrics, order_by, top_k, min_value
+        )
+        base_cols = [c for c in ParquetFlatReader.BASE_COLS if c in df.columns]
+        metric_cols = [c for c in df.columns if c not in base_cols and (not metrics or c in metrics)]
+
+        if dedupe_cells:
+            cells = df.select(CELL_COLS).unique(subset="priogrid_id", maintain_order=True).with_row_index("cell_index")
+            df = df.join(cells.select(["priogrid_id", "cell_index"]), on="priogrid_id", how="left", maintain_order="left")
+            encoded_cells = cells.select([pl.col(c).implode() for c in CELL_COLS]).write_json()[1:-1]
+            columns = ["cell_index", "month_id"] + metric_cols
+        else:
+            columns = ParquetFlatReader.RECORD_COLS + metric_cols
+
+        # Widen Float32 metrics so both layouts emit the same numbers as the rows layout,
+        # which converts every value to a Python float
+        df = df.with_columns([pl.col(c).cast(pl.Float64) for c in metric_cols])
+        encoded = df.select([pl.col(c).implode() for c in columns]).write_json()[1:-1]
+        if dedupe_cells:
+            # Both parts are JSON objects: splice the cells table in as the first key
+            encoded = '{"cells":' + encoded_cells + "," + encoded[1:]
+        return encoded.encode()
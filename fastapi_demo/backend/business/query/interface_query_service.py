@@ -5,7 +5,8 @@ class IForecastQueryService(ABC):
     """
     Interface for forecast query services.
 
-    Defines a method to retrieve forecast data filtered by various optional criteria.
+    Defines methods to retrieve forecast data filtered by various optional criteria,
+    as records or already JSON-encoded.
     """
 
     @abstractmethod
@@ -14,7 +15,10 @@ class IForecastQueryService(ABC):
         month_ids: Optional[List[int]] = None,
         priogrid_ids: Optional[List[int]] = None,
         country_ids: Optional[List[int]] = None,
-        metrics: Optional[List[str]] = None
+        metrics: Optional[List[str]] = None,
+        order_by: Optional[str] = None,
+        top_k: Optional[int] = None,
+        min_value: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """
         Retrieve forecasts based on optional filtering criteria.
@@ -24,8 +28,76 @@ class IForecastQueryService(ABC):
             priogrid_ids (Optional[List[int]]): List of priogrid IDs to filter forecasts. Defaults to None.
             country_ids (Optional[List[int]]): List of country IDs to filter forecasts. Defaults to None.
             metrics (Optional[List[str]]): List of metric names to include. Defaults to None.
+            order_by (Optional[str]): Metric to rank forecasts by, descending within each month. Defaults to None.
+            top_k (Optional[int]): Maximum number of forecasts per month when ranking. Defaults to None.
+            min_value (Optional[float]): Minimum value of the ranking metric. Defaults to None.
 
         Returns:
             List[Dict[str, Any]]: List of forecast records matching the filters.
         """
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def supports_encoded(self, order_by: Optional[str] = None) -> bool:
+        """
+        Tell whether get_forecasts_json can serve a query with the given ranking.
+
+        Args:
+            order_by (Optional[str]): Metric the query is ranked by, if any. Defaults to None.
+
+        Returns:
+            bool: True if the query can be answered already encoded.
+        """
+        pass
+
+    @abstractmethod
+    def get_forecasts_json(
+        self,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+        metrics: Optional[List[str]] = None
+    ) -> bytes:
+        """
+        Retrieve unranked forecasts as a JSON-encoded array of records.
+
+        Args:
+            month_ids (Optional[List[int]]): List of month IDs to filter forecasts. Defaults to None.
+            priogrid_ids (Optional[List[int]]): List of priogrid IDs to filter forecasts. Defaults to None.
+            country_ids (Optional[List[int]]): List of country IDs to filter forecasts. Defaults to None.
+            metrics (Optional[List[str]]): List of metric names to include. Defaults to None.
+
+        Returns:
+            bytes: JSON array of forecast records in the same layout as get_forecasts.
+        """
+        pass
+
+    @abstractmethod
+    def get_forecasts_columnar(
+        self,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+        metrics: Optional[List[str]] = None,
+        order_by: Optional[str] = None,
+        top_k: Optional[int] = None,
+        min_value: Optional[float] = None,
+        dedupe_cells: bool = False
+    ) -> bytes:
+        """
+        Retrieve forecasts encoded as a JSON object with one array per field.
+
+        Args:
+            month_ids (Optional[List[int]]): List of month IDs to filter forecasts. Defaults to None.
+            priogrid_ids (Optional[List[int]]): List of priogrid IDs to filter forecasts. Defaults to None.
+            country_ids (Optional[List[int]]): List of country IDs to filter forecasts. Defaults to None.
+            metrics (Optional[List[str]]): List of metric names to include. Defaults to None.
+            order_by (Optional[str]): Metric to rank forecasts by, descending within each month. Defaults to None.
+            top_k (Optional[int]): Maximum number of forecasts per month when ranking. Defaults to None.
+            min_value (Optional[float]): Minimum value of the ranking metric. Defaults to None.
+            dedupe_cells (bool): Store cell attributes once in a side table. Defaults to False.
+
+        Returns:
+            bytes: JSON-encoded column arrays.
+        """
+        pass
@@ -1,5 +1,6 @@
 from typing import List, Dict, Any, Optional
 from abc import ABC, abstractmethod
+import polars as pl
 
 class IParquetReader(ABC):
     """
@@ -15,6 +16,9 @@ class IParquetReader(ABC):
         priogrid_ids: Optional[List[int]] = None,
         country_ids: Optional[List[int]] = None,
         metrics: Optional[List[str]] = None,
+        order_by: Optional[str] = None,
+        top_k: Optional[int] = None,
+        min_value: Optional[float] = None,
     ) -> List[Dict[str, Any]]:
         """
         Return a list of filtered forecast records.
@@ -27,12 +31,77 @@ class IParquetReader(ABC):
             priogrid_ids (Optional[List[int]]): List of spatial grid cell IDs to filter by. Defaults to None.
             country_ids (Optional[List[int]]): List of country IDs to filter by. Defaults to None.
             metrics (Optional[List[str]]): List of metric names to include in results. Defaults to None.
+            order_by (Optional[str]): Metric to rank results by, descending within each month. Defaults to None.
+            top_k (Optional[int]): Maximum number of results per month when ranking. Defaults to None.
+            min_value (Optional[float]): Minimum value of the ranking metric. Defaults to None.
 
         Returns:
             List[Dict[str, Any]]: List of forecast records matching the filters.
         """
         pass
 
+    @abstractmethod
+    def metric_frame(
+        self,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+        metrics: Optional[List[str]] = None,
+        order_by: Optional[str] = None,
+        top_k: Optional[int] = None,
+        min_value: Optional[float] = None,
+    ) -> pl.DataFrame:
+        """
+        Return filtered forecasts as a columnar DataFrame.
+
+        The frame holds the location and time columns plus one column per
+        requested metric, so callers can join and compute on it without
+        building per-row dictionaries.
+
+        Args:
+            month_ids (Optional[List[int]]): List of month IDs to filter by. Defaults to None.
+            priogrid_ids (Optional[List[int]]): List of spatial grid cell IDs to filter by. Defaults to None.
+            country_ids (Optional[List[int]]): List of country IDs to filter by. Defaults to None.
+            metrics (Optional[List[str]]): List of metric names to include. Defaults to None (all).
+            order_by (Optional[str]): Metric to rank results by, descending within each month. Defaults to None.
+            top_k (Optional[int]): Maximum number of results per month when ranking. Defaults to None.
+            min_value (Optional[float]): Minimum value of the ranking metric. Defaults to None.
+
+        Returns:
+            pl.DataFrame: Forecast records matching the filters.
+        """
+        pass
+
+    @abstractmethod
+    def count(
+        self,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+    ) -> int:
+        """
+        Return the number of forecast records matching the filters, without computing metrics.
+
+        Args:
+            month_ids (Optional[List[int]]): List of month IDs to filter by. Defaults to None.
+            priogrid_ids (Optional[List[int]]): List of spatial grid cell IDs to filter by. Defaults to None.
+            country_ids (Optional[List[int]]): List of country IDs to filter by. Defaults to None.
+
+        Returns:
+            int: Number of matching records.
+        """
+        pass
+
+    @abstractmethod
+    def memory_report(self) -> Dict[str, Any]:
+        """
+        Return the estimated memory usage of the loaded data.
+
+        Returns:
+            Dict[str, Any]: Dataset totals and a per-column breakdown of dtype and bytes.
+        """
+        pass
+
     @abstractmethod
     def list_months(self) -> List[int]:
         """
@@ -1,6 +1,7 @@
+import hashlib
 from pathlib import Path
 import polars as pl
-from typing import List, Optional, Dict, Any, Iterator
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from dataAccess.interface_parquet_reader import IParquetReader
 
 class ParquetFlatReader(IParquetReader):
@@ -11,16 +12,36 @@ class ParquetFlatReader(IParquetReader):
     and performs all subsequent queries by filtering the in-memory DataFrame.
     It streams filtered records one by one using a generator for better performance.
 
+    For ranked queries it also precomputes, per (month, metric), the row
+    positions sorted by metric value, so top-K and threshold lookups only
+    touch the rows they return.
+
+    When compaction is enabled (the default), the public metrics are
+    materialized once at load, the source sample and HDI columns are dropped,
+    and the ID columns are downcast to the smallest integer type that fits.
+
     Attributes:
         BASE_COLS (List[str]): Columns common to all records.
+        RECORD_COLS (List[str]): Location and time fields returned with every forecast record.
         METRIC_COLS (List[str]): List of forecast metric columns.
+        METRIC_SOURCES (Dict[str, str]): Source parquet column for each non-derived metric.
+        ID_COLS (List[str]): Integer columns downcast during compaction.
+        METRIC_PRECISIONS (Dict[str, pl.DataType]): Supported storage types for compacted metrics.
 
     Args:
         base_path (str): Path to the directory containing parquet files.
+        run (str): Name of the forecast run, used as the parquet file prefix.
+        compact (bool): Whether to compact the joined frame at load.
+        metric_precision (str): Storage type of compacted metrics, 'float64' or 'float32'.
+
+    After loading, 'version' identifies the source files (name, size and
+    modification time), so results derived from the run can be reused safely.
     """
 
     BASE_COLS = ["priogrid_id", "month_id", "country_id", "lat", "lon", "row", "col"]
 
+    RECORD_COLS = ["priogrid_id", "month_id", "country_id", "lat", "lon"]
+
     METRIC_COLS = [
         "MAP",
         "HDI_50_lower", "HDI_50_upper",
@@ -30,17 +51,301 @@ class ParquetFlatReader(IParquetReader):
         "prob_threshold_4", "prob_threshold_5", "prob_threshold_6"
     ]
 
-    def __init__(self, base_path: str):
+    MAP_SOURCES = ["pred_ln_sb_best", "pred_ln_ns_best", "pred_ln_os_best"]
+
+    METRIC_SOURCES = {
+        "HDI_50_lower": "pred_ln_sb_best_hdi_lower",
+        "HDI_50_upper": "pred_ln_sb_best_hdi_upper",
+        "HDI_90_lower": "pred_ln_ns_best_hdi_lower",
+        "HDI_90_upper": "pred_ln_ns_best_hdi_upper",
+        "HDI_99_lower": "pred_ln_os_best_hdi_lower",
+        "HDI_99_upper": "pred_ln_os_best_hdi_upper",
+        "prob_threshold_1": "pred_ln_sb_prob_hdi_lower",
+        "prob_threshold_2": "pred_ln_sb_prob_hdi_upper",
+        "prob_threshold_3": "pred_ln_ns_prob_hdi_lower",
+        "prob_threshold_4": "pred_ln_ns_prob_hdi_upper",
+        "prob_threshold_5": "pred_ln_os_prob_hdi_lower",
+        "prob_threshold_6": "pred_ln_os_prob_hdi_upper",
+    }
+
+    ID_COLS = ["priogrid_id", "month_id", "country_id", "row", "col"]
+
+    METRIC_PRECISIONS = {
+        "float64": pl.Float64,
+        "float32": pl.Float32,
+    }
+
+    # Candidate integer types, smallest first, with their (min, max) range
+    _INT_TYPES = [
+        (pl.UInt8, 0, 2**8 - 1),
+        (pl.Int8, -2**7, 2**7 - 1),
+        (pl.UInt16, 0, 2**16 - 1),
+        (pl.Int16, -2**15, 2**15 - 1),
+        (pl.UInt32, 0, 2**32 - 1),
+        (pl.Int32, -2**31, 2**31 - 1),
+    ]
+
+    def __init__(
+        self,
+        base_path: str,
+        run: str = "preds_001",
+        compact: bool = True,
+        metric_precision: str = "float64",
+    ):
         """
         Initialize the reader by loading and joining parquet files.
 
         Args:
             base_path (str): Path to the folder containing parquet forecast files.
+            run (str): Forecast run to load. Reads '<run>.parquet' and '<run>_90_hdi.parquet'.
+            compact (bool): Materialize metrics, drop unused columns and downcast IDs at load.
+            metric_precision (str): Storage type of compacted metrics, 'float64' or 'float32'.
+
+        Raises:
+            ValueError: If 'metric_precision' is not supported.
         """
+        if metric_precision not in self.METRIC_PRECISIONS:
+            raise ValueError(f"Unsupported metric precision: {metric_precision}")
         self.base_path = Path(base_path)
-        df_main = pl.read_parquet(self.base_path / "preds_001.parquet")
-        df_hdi = pl.read_parquet(self.base_path / "preds_001_90_hdi.parquet")
+        self.run = run
+        self.metric_precision = metric_precision
+        main_path = self.base_path / f"{run}.parquet"
+        hdi_path = self.base_path / f"{run}_90_hdi.parquet"
+        file_stats = [(p.name, p.stat().st_size, p.stat().st_mtime_ns) for p in (main_path, hdi_path)]
+        self.version = hashlib.sha1(repr(file_stats).encode()).hexdigest()[:12]
+        df_main = pl.read_parquet(main_path)
+        df_hdi = pl.read_parquet(hdi_path)
         self.df = df_main.join(df_hdi, on=["month_id", "priogrid_id"], how="left")
+        self._loaded_bytes = self.df.estimated_size()
+        if compact:
+            self.df = self._compact(self.df)
+        self._build_rank_indexes()
+
+
+    @classmethod
+    def _smallest_int_type(cls, series: pl.Series) -> pl.DataType:
+        """
+        Return the smallest integer type able to hold every value of the series.
+        """
+        low, high = series.min(), series.max()
+        if low is None:
+            return series.dtype
+        for dtype, type_min, type_max in cls._INT_TYPES:
+            if low >= type_min and high <= type_max:
+                return dtype
+        return series.dtype
+
+
+    def _compact(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Keep only the base columns and the public metrics, with the smallest types that fit.
+        """
+        metric_type = self.METRIC_PRECISIONS[self.metric_precision]
+        base_exprs = []
+        for col in self.BASE_COLS:
+            if col not in df.columns:
+                continue
+            if col in self.ID_COLS and df.schema[col].is_integer():
+                base_exprs.append(pl.col(col).cast(self._smallest_int_type(df[col])))
+            else:
+                base_exprs.append(pl.col(col))
+        metric_exprs = [self._metric_expr(m, df.columns).cast(metric_type) for m in self.METRIC_COLS]
+        return df.select(base_exprs + metric_exprs)
+
+
+    def memory_report(self) -> Dict[str, Any]:
+        """
+        Return the estimated memory usage of the loaded run.
+
+        Returns:
+            Dict[str, Any]: Run name, row count, size as read from disk ('loaded_bytes'),
+            current frame size, rank index size, total size and a per-column breakdown
+            with dtype and bytes.
+        """
+        columns = {
+            name: {"dtype": str(dtype), "bytes": self.df[name].estimated_size()}
+            for name, dtype in self.df.schema.items()
+        }
+        frame_bytes = self.df.estimated_size()
+        index_bytes = sum(
+            rows.estimated_size() + values.estimated_size()
+            for rows, values in self._rank_index.values()
+        )
+        return {
+            "run": self.run,
+            "rows": self.df.height,
+            "loaded_bytes": self._loaded_bytes,
+            "frame_bytes": frame_bytes,
+            "rank_index_bytes": index_bytes,
+            "total_bytes": frame_bytes + index_bytes,
+            "columns": columns,
+        }
+
+
+    def _build_rank_indexes(self) -> None:
+        """
+        Precompute per-(month, metric) sort indexes over the joined frame.
+
+        Each entry holds the row positions of a month sorted by ascending metric
+        value, together with the sorted values. Null values are left out. The
+        sorted list of indexed months is kept as well.
+        """
+        self._rank_index: Dict[Tuple[int, str], Tuple[pl.Series, pl.Series]] = {}
+        ranked = self.df.with_row_index("_row").select(
+            ["_row", "month_id"] + [self._metric_expr(m) for m in self.METRIC_COLS]
+        )
+        for metric in self.METRIC_COLS:
+            sorted_df = (
+                ranked.select(["_row", "month_id", metric])
+                .drop_nulls(metric)
+                .sort(["month_id", metric])
+            )
+            for (month_id,), part in sorted_df.partition_by("month_id", as_dict=True, maintain_order=True).items():
+                self._rank_index[(month_id, metric)] = (part["_row"], part[metric])
+        # Months that have an index, so unfiltered rankings do not scan the frame for them
+        self._rank_months: List[int] = sorted({month_id for month_id, _ in self._rank_index})
+
+
+    def _ranked(
+        self,
+        order_by: str,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+        top_k: Optional[int] = None,
+        min_value: Optional[float] = None,
+    ) -> pl.DataFrame:
+        """
+        Return rows sorted by descending metric value within each month, using the rank indexes.
+
+        Months are returned in ascending order. 'top_k' limits the number of rows per month
+        and 'min_value' keeps only rows whose metric is greater than or equal to it.
+        """
+        months = sorted(set(month_ids)) if month_ids else self._rank_months
+        parts = []
+        for month_id in months:
+            entry = self._rank_index.get((month_id, order_by))
+            if entry is None:
+                continue
+            rows, values = entry
+            start = values.search_sorted(min_value, side="left") if min_value is not None else 0
+            if top_k is not None and not priogrid_ids and not country_ids:
+                # Only the K largest values are needed: slice them off the end before reversing
+                start = max(start, len(rows) - top_k)
+            rows = rows[start:].reverse()
+            part = self.df[rows]
+            if priogrid_ids:
+                part = part.filter(pl.col("priogrid_id").is_in(priogrid_ids))
+            if country_ids:
+                part = part.filter(pl.col("country_id").is_in(country_ids))
+            if top_k is not None:
+                part = part.head(top_k)
+            parts.append(part)
+        return pl.concat(parts) if parts else self.df.clear()
+
+
+    def _filter(
+        self,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+    ) -> pl.DataFrame:
+        """
+        Apply the optional month, cell and country filters to the joined frame.
+        """
+        df = self.df
+        if month_ids:
+            df = df.filter(pl.col("month_id").is_in(month_ids))
+        if priogrid_ids:
+            df = df.filter(pl.col("priogrid_id").is_in(priogrid_ids))
+        if country_ids:
+            df = df.filter(pl.col("country_id").is_in(country_ids))
+        return df
+
+
+    def _metric_expr(self, metric: str, columns: Optional[List[str]] = None) -> pl.Expr:
+        """
+        Build the Polars expression computing a public metric from the source columns.
+
+        'MAP' is the mean of all samples in the three prediction lists; every other
+        metric is a renamed HDI column. Metrics already materialized by compaction are
+        read directly. Missing source columns yield nulls.
+        """
+        columns = columns if columns is not None else self.df.columns
+        if metric in columns:
+            return pl.col(metric)
+        if metric == "MAP":
+            sources = [c for c in self.MAP_SOURCES if c in columns]
+            if not sources:
+                return pl.lit(None, dtype=pl.Float64).alias("MAP")
+            total = pl.sum_horizontal([pl.col(c).list.sum().fill_null(0) for c in sources])
+            count = pl.sum_horizontal([pl.col(c).list.len().fill_null(0) for c in sources])
+            return (
+                pl.when(count > 0)
+                .then(total.cast(pl.Float64) / count)
+                .otherwise(None)
+                .alias("MAP")
+            )
+        source = self.METRIC_SOURCES[metric]
+        if source not in columns:
+            return pl.lit(None, dtype=pl.Float64).alias(metric)
+        return pl.col(source).alias(metric)
+
+
+    def metric_frame(
+        self,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+        metrics: Optional[List[str]] = None,
+        order_by: Optional[str] = None,
+        top_k: Optional[int] = None,
+        min_value: Optional[float] = None,
+    ) -> pl.DataFrame:
+        """
+        Return filtered forecasts as a DataFrame with one column per public metric.
+
+        Args:
+            month_ids (Optional[List[int]]): Filter by month IDs.
+            priogrid_ids (Optional[List[int]]): Filter by priogrid IDs.
+            country_ids (Optional[List[int]]): Filter by country IDs.
+            metrics (Optional[List[str]]): Subset of metric columns to include. Defaults to all.
+            order_by (Optional[str]): Metric to rank by, descending within each month.
+            top_k (Optional[int]): Maximum number of rows per month. Requires 'order_by'.
+            min_value (Optional[float]): Minimum value of the 'order_by' metric. Requires 'order_by'.
+
+        Returns:
+            pl.DataFrame: Base columns followed by the requested metric columns.
+        """
+        if order_by:
+            df = self._ranked(order_by, month_ids, priogrid_ids, country_ids, top_k, min_value)
+        else:
+            df = self._filter(month_ids, priogrid_ids, country_ids)
+        metric_cols = metrics if metrics else self.METRIC_COLS
+        metric_cols = [c for c in self.METRIC_COLS if c in metric_cols]
+        base_cols = [c for c in self.BASE_COLS if c in df.columns]
+        return df.select(base_cols + [self._metric_expr(m) for m in metric_cols])
+
+
+    def count(
+        self,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+    ) -> int:
+        """
+        Return the number of forecasts matching the filters.
+
+        Only the filter columns are read, so no rows or metrics are materialized.
+        """
+        lf = self.df.lazy()
+        if month_ids:
+            lf = lf.filter(pl.col("month_id").is_in(month_ids))
+        if priogrid_ids:
+            lf = lf.filter(pl.col("priogrid_id").is_in(priogrid_ids))
+        if country_ids:
+            lf = lf.filter(pl.col("country_id").is_in(country_ids))
+        return lf.select(pl.len()).collect().item()
 
 
     def query(
@@ -49,6 +354,9 @@ class ParquetFlatReader(IParquetReader):
         priogrid_ids: Optional[List[int]] = None,
         country_ids: Optional[List[int]] = None,
         metrics: Optional[List[str]] = None,
+        order_by: Optional[str] = None,
+        top_k: Optional[int] = None,
+        min_value: Optional[float] = None,
     ) -> Iterator[Dict[str, Any]]:
         """
         Yield filtered forecast records as dictionaries, streaming one row at a time.
@@ -60,53 +368,19 @@ class ParquetFlatReader(IParquetReader):
             priogrid_ids (Optional[List[int]]): Filter by priogrid IDs.
             country_ids (Optional[List[int]]): Filter by country IDs.
             metrics (Optional[List[str]]): Subset of metric columns to include. Defaults to all.
+            order_by (Optional[str]): Metric to rank by, descending within each month.
+            top_k (Optional[int]): Maximum number of rows per month. Requires 'order_by'.
+            min_value (Optional[float]): Minimum value of the 'order_by' metric. Requires 'order_by'.
 
         Yields:
             Dict[str, Any]: Forecast record with location, time, and requested metric values.
         """
-        df = self.df
-
-        # Filtri
-        if month_ids:
-            df = df.filter(pl.col("month_id").is_in(month_ids))
-        if priogrid_ids:
-            df = df.filter(pl.col("priogrid_id").is_in(priogrid_ids))
-        if country_ids:
-            df = df.filter(pl.col("country_id").is_in(country_ids))
-
-        # Determina metriche da restituire
         metric_cols = metrics if metrics else self.METRIC_COLS
-        metric_cols = [c for c in metric_cols if c in self.METRIC_COLS]
+        metric_cols = [c for c in self.METRIC_COLS if c in metric_cols]
+        df = self.metric_frame(month_ids, priogrid_ids, country_ids, metric_cols, order_by, top_k, min_value)
 
         # Streaming riga per riga
         for row in df.iter_rows(named=True):
-            # Calcola MAP come media di pred_ln_*_best
-            pred_lists = []
-            for key in ["pred_ln_sb_best", "pred_ln_ns_best", "pred_ln_os_best"]:
-                lst = row.get(key)
-                if lst:
-                    pred_lists.extend(lst)
-            MAP = float(sum(pred_lists) / len(pred_lists)) if pred_lists else None
-
-            # Costruzione dizionario valori
-            values_dict = {
-                "MAP": MAP,
-                "HDI_50_lower": row.get("pred_ln_sb_best_hdi_lower"),
-                "HDI_50_upper": row.get("pred_ln_sb_best_hdi_upper"),
-                "HDI_90_lower": row.get("pred_ln_ns_best_hdi_lower"),
-                "HDI_90_upper": row.get("pred_ln_ns_best_hdi_upper"),
-                "HDI_99_lower": row.get("pred_ln_os_best_hdi_lower"),
-                "HDI_99_upper": row.get("pred_ln_os_best_hdi_upper"),
-                "prob_threshold_1": row.get("pred_ln_sb_prob_hdi_lower"),
-                "prob_threshold_2": row.get("pred_ln_sb_prob_hdi_upper"),
-                "prob_threshold_3": row.get("pred_ln_ns_prob_hdi_lower"),
-                "prob_threshold_4": row.get("pred_ln_ns_prob_hdi_upper"),
-                "prob_threshold_5": row.get("pred_ln_os_prob_hdi_lower"),
-                "prob_threshold_6": row.get("pred_ln_os_prob_hdi_upper"),
-            }
-
-            values_dict = {k: v for k, v in values_dict.items() if k in metric_cols}
-
             cell_record = {
                 "priogrid_id": row["priogrid_id"],
                 "lat": row.get("lat"),
@@ -115,7 +389,7 @@ class ParquetFlatReader(IParquetReader):
                 "month_id": row["month_id"],
                 "row": row.get("row"),
                 "col": row.get("col"),
-                "values": values_dict
+                "values": {k: row[k] for k in metric_cols}
             }
 
             yield cell_record
@@ -0,0 +1,79 @@
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional
+from dataAccess.interface_parquet_reader import IParquetReader
+from dataAccess.parquet_reader import ParquetFlatReader
+
+class RunRegistry:
+    """
+    Registry of forecast runs available in a data directory.
+
+    A run named '<run>' is available when both '<run>.parquet' and
+    '<run>_90_hdi.parquet' exist in the base path. Readers are loaded lazily
+    on first access and kept in memory afterwards.
+
+    Args:
+        base_path (str): Path to the directory containing parquet files.
+        preloaded (Optional[Dict[str, IParquetReader]]): Readers that are already loaded, keyed by run.
+        **reader_options: Extra keyword arguments passed to ParquetFlatReader when loading a run.
+    """
+
+    HDI_SUFFIX = "_90_hdi"
+
+    def __init__(
+        self,
+        base_path: str,
+        preloaded: Optional[Dict[str, IParquetReader]] = None,
+        **reader_options: Any,
+    ):
+        self.base_path = Path(base_path)
+        self._readers: Dict[str, IParquetReader] = dict(preloaded or {})
+        self._reader_options = reader_options
+        self._lock = Lock()
+
+    def loaded_runs(self) -> Dict[str, IParquetReader]:
+        """
+        Return the readers currently held in memory, keyed by run.
+
+        Returns:
+            Dict[str, IParquetReader]: Loaded readers.
+        """
+        with self._lock:
+            return dict(self._readers)
+
+    def list_runs(self) -> List[str]:
+        """
+        Return the names of all runs found on disk or already loaded.
+
+        Returns:
+            List[str]: Sorted list of run names.
+        """
+        runs = set(self._readers)
+        for path in self.base_path.glob("*.parquet"):
+            if path.stem.endswith(self.HDI_SUFFIX):
+                continue
+            if (self.base_path / f"{path.stem}{self.HDI_SUFFIX}.parquet").exists():
+                runs.add(path.stem)
+        return sorted(runs)
+
+    def get(self, run: str) -> IParquetReader:
+        """
+        Return the reader for a run, loading it on first use.
+
+        Args:
+            run (str): Name of the forecast run.
+
+        Returns:
+            IParquetReader: Reader holding the run in memory.
+
+        Raises:
+            KeyError: If the run does not exist in the base path.
+        """
+        with self._lock:
+            if run not in self._readers:
+                if run not in self.list_runs():
+                    raise KeyError(run)
+                self._readers[run] = ParquetFlatReader(
+                    base_path=str(self.base_path), run=run, **self._reader_options
+                )
+            return self._readers[run]
@@ -0,0 +1,291 @@
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from threading import Lock
+from typing import List, Optional, Dict, Any
+import polars as pl
+from dataAccess.parquet_reader import ParquetFlatReader
+
+logger = logging.getLogger(__name__)
+
+SHARD_DIR_PREFIX = "views_shards_"
+
+# Shards loaded by the current worker process, keyed by file path
+_WORKER_SHARDS: Dict[str, pl.DataFrame] = {}
+
+RECORD_COLS = ParquetFlatReader.RECORD_COLS
+
+
+def _load_shard(path: str) -> pl.DataFrame:
+    """
+    Return the shard stored at path, memory-mapping it on first use in this process.
+    """
+    if path not in _WORKER_SHARDS:
+        _WORKER_SHARDS[path] = pl.read_ipc(path, memory_map=True)
+    return _WORKER_SHARDS[path]
+
+
+def _query_shard(
+    path: str,
+    month_ids: Optional[List[int]],
+    priogrid_ids: Optional[List[int]],
+    country_ids: Optional[List[int]],
+    metrics: List[str],
+) -> bytes:
+    """
+    Filter one shard and encode the matching records as comma-separated JSON objects.
+
+    Runs inside a worker process. The result has no enclosing brackets so partial
+    results from several shards can be concatenated into a single JSON array.
+    """
+    df = _load_shard(path)
+    if month_ids:
+        df = df.filter(pl.col("month_id").is_in(month_ids))
+    if priogrid_ids:
+        df = df.filter(pl.col("priogrid_id").is_in(priogrid_ids))
+    if country_ids:
+        df = df.filter(pl.col("country_id").is_in(country_ids))
+    if df.is_empty():
+        return b""
+
+    if metrics:
+        # Widened like the in-process path, which converts every value to a Python float
+        values = pl.struct([pl.col(m).cast(pl.Float64) for m in metrics]).alias("values")
+        encoded = df.select(RECORD_COLS + [values]).write_json()
+        return encoded[1:-1].encode()
+
+    # A struct needs at least one field, so an empty metric selection is encoded by hand
+    return ",".join(
+        json.dumps({**row, "values": {}}, separators=(",", ":"))
+        for row in df.select(RECORD_COLS).iter_rows(named=True)
+    ).encode()
+
+
+class ShardedQueryExecutor:
+    """
+    Scatter-gather query execution over worker processes.
+
+    The reader's metric frame is split into shards, either by contiguous month
+    ranges or by groups of countries, and each shard is written as an
+    uncompressed Arrow IPC file in shared memory (/dev/shm when it has room,
+    the temporary directory otherwise).
+    Worker processes memory-map the shards, so the data is not copied per
+    process. A query is sent only to the shards that can match its filters;
+    each worker filters and encodes its part to JSON, and the byte strings
+    are concatenated into the response.
+
+    If a worker process dies (e.g. killed when out of memory), the pool is
+    replaced with fresh workers, which map the same shard files, and the query
+    is retried once.
+
+    The owner must call close() on shutdown to stop the workers and free the
+    shared memory. Shard directories carry the owner's pid, so directories left
+    behind by a process that died without closing are removed at the next start.
+
+    Attributes:
+        PARTITIONS (List[str]): Supported partitioning keys.
+
+    Args:
+        reader (ParquetFlatReader): Reader holding the run to shard.
+        workers (int): Number of worker processes.
+        partition_by (str): 'month' or 'country'.
+        shards_per_worker (int): Number of shards created per worker, to balance skewed partitions.
+    """
+
+    PARTITIONS = ["month", "country"]
+
+    def __init__(
+        self,
+        reader: ParquetFlatReader,
+        workers: int,
+        partition_by: str = "month",
+        shards_per_worker: int = 2,
+    ):
+        if partition_by not in self.PARTITIONS:
+            raise ValueError(f"Unsupported partitioning: {partition_by}")
+        if workers < 1:
+            raise ValueError("At least one worker is required")
+
+        self.partition_by = partition_by
+        self.workers = workers
+        self.metric_cols = list(ParquetFlatReader.METRIC_COLS)
+        self._closed = False
+        df = reader.metric_frame()
+        parent = self._shard_parent(df.estimated_size())
+        self.remove_stale_shards(parent)
+        self._dir = tempfile.mkdtemp(prefix=f"{SHARD_DIR_PREFIX}{os.getpid()}_", dir=parent)
+        self.shards: List[Dict[str, Any]] = []
+
+        for number, part in enumerate(self._partition(df, workers * shards_per_worker)):
+            path = str(Path(self._dir) / f"shard_{number:03d}.arrow")
+            part.write_ipc(path, compression="uncompressed")
+            self.shards.append({
+                "path": path,
+                "rows": part.height,
+                "months": set(part["month_id"].unique().to_list()),
+                "countries": set(part["country_id"].unique().to_list()),
+            })
+
+        self._pool_lock = Lock()
+        self._pool = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # Polars is multithreaded, so worker processes must not be forked
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        """
+        Swap a broken pool for a new one, unless another thread already did.
+        """
+        with self._pool_lock:
+            if self._closed:
+                raise RuntimeError("Executor is closed")
+            if self._pool is broken:
+                logger.warning("A query worker died, restarting the worker pool")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._new_pool()
+
+    @staticmethod
+    def _shard_parent(size: int) -> str:
+        """
+        Return the directory to create the shards in: shared memory if it has room for them.
+
+        Docker limits /dev/shm to 64 MB unless 'shm_size' is set, which is too small
+        for a full run; the shards then go to the temporary directory, where the page
+        cache still lets the workers share them.
+        """
+        shm = Path("/dev/shm")
+        if shm.is_dir():
+            # Keep some room for other users of shared memory, e.g. multiprocessing
+            if shutil.disk_usage(shm).free >= size * 1.2:
+                return str(shm)
+            logger.warning(
+                "Not enough space in /dev/shm for %d MB of shards, using %s instead",
+                size // 2**20, tempfile.gettempdir(),
+            )
+        return tempfile.gettempdir()
+
+    @staticmethod
+    def remove_stale_shards(parent: str) -> None:
+        """
+        Delete shard directories in parent whose owning process no longer exists.
+
+        Args:
+            parent (str): Directory holding the shard directories.
+        """
+        for path in Path(parent).glob(f"{SHARD_DIR_PREFIX}*"):
+            owner = path.name[len(SHARD_DIR_PREFIX):].split("_", 1)[0]
+            if not owner.isdigit():
+                continue
+            try:
+                os.kill(int(owner), 0)
+            except ProcessLookupError:
+                shutil.rmtree(path, ignore_errors=True)
+            except PermissionError:
+                # The process exists but belongs to another user
+                continue
+
+    def _partition(self, df: pl.DataFrame, count: int) -> List[pl.DataFrame]:
+        """
+        Split the frame into at most 'count' shards of similar row counts.
+
+        Month partitions are contiguous month ranges; country partitions assign
+        each country to the currently smallest shard, largest countries first.
+        """
+        key = "month_id" if self.partition_by == "month" else "country_id"
+        sizes = df.group_by(key).len().sort(key)
+        groups: List[List[Any]] = []
+
+        if self.partition_by == "month":
+            target = df.height / count
+            current, current_rows = [], 0
+            for value, rows in sizes.iter_rows():
+                current.append(value)
+                current_rows += rows
+                if current_rows >= target and len(groups) < count - 1:
+                    groups.append(current)
+                    current, current_rows = [], 0
+            if current:
+                groups.append(current)
+        else:
+            buckets = [([], 0) for _ in range(min(count, sizes.height))]
+            for value, rows in sizes.sort("len", descending=True).iter_rows():
+                index = min(range(len(buckets)), key=lambda i: buckets[i][1])
+                values, total = buckets[index]
+                buckets[index] = (values + [value], total + rows)
+            groups = [values for values, _ in buckets if values]
+
+        return [df.filter(pl.col(key).is_in(values)) for values in groups]
+
+    def _matching_shards(
+        self,
+        month_ids: Optional[List[int]],
+        country_ids: Optional[List[int]],
+    ) -> List[str]:
+        """
+        Return the paths of the shards that may contain rows for the given filters.
+        """
+        paths = []
+        for shard in self.shards:
+            if month_ids and shard["months"].isdisjoint(month_ids):
+                continue
+            if country_ids and shard["countries"].isdisjoint(country_ids):
+                continue
+            paths.append(shard["path"])
+        return paths
+
+    def query_json(
+        self,
+        month_ids: Optional[List[int]] = None,
+        priogrid_ids: Optional[List[int]] = None,
+        country_ids: Optional[List[int]] = None,
+        metrics: Optional[List[str]] = None,
+    ) -> bytes:
+        """
+        Run a forecast query on the matching shards and return the JSON-encoded result.
+
+        Args:
+            month_ids (Optional[List[int]]): Filter by month IDs.
+            priogrid_ids (Optional[List[int]]): Filter by priogrid IDs.
+            country_ids (Optional[List[int]]): Filter by country IDs.
+            metrics (Optional[List[str]]): Subset of metric columns to include. Defaults to all.
+
+        Returns:
+            bytes: A JSON array of records with priogrid_id, month_id, country_id, lat, lon
+            and a 'values' object, in the same layout as the /forecasts endpoint.
+        """
+        metric_cols = [c for c in self.metric_cols if not metrics or c in metrics]
+        paths = self._matching_shards(month_ids, country_ids)
+        for attempt in range(2):
+            pool = self._pool
+            try:
+                futures = [
+                    pool.submit(_query_shard, path, month_ids, priogrid_ids, country_ids, metric_cols)
+                    for path in paths
+                ]
+                parts = [f.result() for f in futures]
+                break
+            except BrokenProcessPool:
+                self._replace_pool(pool)
+                if attempt:
+                    raise
+        return b"[" + b",".join(p for p in parts if p) + b"]"
+
+    def close(self) -> None:
+        """
+        Stop the worker processes and delete the shard files. Safe to call more than once.
+        """
+        with self._pool_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(self._dir, ignore_errors=True)
@@ -0,0 +1,114 @@
+"""
+Synthetic forecast dataset generator.
+
+Writes '<run>.parquet' and '<run>_90_hdi.parquet' with the same layout as the
+VIEWS forecast files read by ParquetFlatReader: one row per (month_id, priogrid_id),
+sample lists for the MAP computation and HDI bound columns for the other metrics.
+
+Usage:
+    python -m loadtest.generate_data --output /tmp/views_data --months 36 --cells 10000
+"""
+
+import argparse
+import random
+from pathlib import Path
+from typing import Dict, List
+import polars as pl
+
+VIOLENCE_TYPES = ["sb", "ns", "os"]
+
+GRID_COLUMNS = 720
+
+
+def _cell_grid(cells: int, countries: int, seed: int) -> Dict[str, List]:
+    """
+    Build the static cell attributes: a rectangular block of 0.5° cells split into countries.
+    """
+    rng = random.Random(seed)
+    width = max(1, int(cells ** 0.5))
+    first_row, first_col = 180, 340
+    grid: Dict[str, List] = {"priogrid_id": [], "country_id": [], "lat": [], "lon": [], "row": [], "col": []}
+    country_ids = sorted(rng.sample(range(1, 900), countries))
+    for i in range(cells):
+        row = first_row + i // width
+        col = first_col + i % width
+        grid["priogrid_id"].append((row - 1) * GRID_COLUMNS + col)
+        grid["country_id"].append(country_ids[i * countries // cells])
+        grid["lat"].append(-90 + (row - 0.5) * 0.5)
+        grid["lon"].append(-180 + (col - 0.5) * 0.5)
+        grid["row"].append(row)
+        grid["col"].append(col)
+    return grid
+
+
+def generate_dataset(
+    output: str,
+    run: str = "preds_001",
+    months: int = 36,
+    cells: int = 10000,
+    countries: int = 20,
+    samples: int = 8,
+    first_month: int = 409,
+    seed: int = 0,
+) -> Path:
+    """
+    Generate a synthetic forecast run.
+
+    Args:
+        output (str): Directory the parquet files are written to. Created if missing.
+        run (str): Run name used as the file prefix.
+        months (int): Number of consecutive months.
+        cells (int): Number of grid cells.
+        countries (int): Number of countries the cells are split into.
+        samples (int): Number of samples per prediction list.
+        first_month (int): First month_id.
+        seed (int): Random seed.
+
+    Returns:
+        Path: The output directory.
+    """
+    rng = random.Random(seed)
+    out = Path(output)
+    out.mkdir(parents=True, exist_ok=True)
+
+    grid = pl.DataFrame(_cell_grid(cells, countries, seed))
+    month_ids = pl.DataFrame({"month_id": list(range(first_month, first_month + months))})
+    keys = month_ids.join(grid, how="cross")
+    rows = keys.height
+
+    # Mostly quiet cells with a heavy tail, on the log scale of the real forecasts
+    risk = [rng.random() ** 6 * 6 for _ in range(rows)]
+    main_cols = {}
+    hdi_cols = {"month_id": keys["month_id"], "priogrid_id": keys["priogrid_id"]}
+    for violence in VIOLENCE_TYPES:
+        flat = [r * rng.uniform(0.5, 1.5) for r in risk for _ in range(samples)]
+        main_cols[f"pred_ln_{violence}_best"] = (
+            pl.Series(flat).reshape((rows, samples)).cast(pl.List(pl.Float64))
+        )
+        for kind in ["best", "prob"]:
+            lower = [r * rng.uniform(0.2, 0.9) for r in risk]
+            hdi_cols[f"pred_ln_{violence}_{kind}_hdi_lower"] = lower
+            hdi_cols[f"pred_ln_{violence}_{kind}_hdi_upper"] = [low + rng.uniform(0.1, 2.0) for low in lower]
+
+    keys.with_columns(**main_cols).write_parquet(out / f"{run}.parquet")
+    pl.DataFrame(hdi_cols).write_parquet(out / f"{run}_90_hdi.parquet")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic VIEWS forecast run.")
+    parser.add_argument("--output", required=True, help="Directory to write the parquet files to")
+    parser.add_argument("--run", default="preds_001", help="Run name used as file prefix")
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--cells", type=int, default=10000)
+    parser.add_argument("--countries", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_dataset(
+        args.output, args.run, args.months, args.cells, args.countries, args.samples, seed=args.seed
+    )
+
+
+if __name__ == "__main__":
+    main()
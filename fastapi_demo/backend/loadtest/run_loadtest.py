@@ -0,0 +1,333 @@
+"""
+End-to-end load test for the forecast API.
+
+Starts 'main:app' under uvicorn on a synthetic dataset, drives it with a mix of
+concurrent requests from an asyncio/httpx client and writes a JSON report with
+throughput, latency percentiles, error rates and server memory usage.
+
+Traffic mix (relative weights, configurable with --mix):
+    catalog        /months, /countries, /metrics and /cells?country_id=
+    cell_series    /forecasts for one cell over all months
+    month_map      /forecasts for every cell of one month (MAP only)
+    multi_country  /forecasts for several countries over several months
+
+Usage:
+    python -m loadtest.run_loadtest --workers 2 --duration 30 --output report.json
+    python -m loadtest.run_loadtest --server-env QUERY_WORKERS=4 --output sharded.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+import polars as pl
+from loadtest.generate_data import generate_dataset
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+API_PREFIX = "/api/preds_001/pgm/sb"
+
+DEFAULT_MIX = {"catalog": 30, "cell_series": 30, "month_map": 25, "multi_country": 15}
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    Return the q-th percentile (0-100) of values using linear interpolation, or None if empty.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples: List[Tuple[str, float, int, int]], duration: float) -> Dict[str, Any]:
+    """
+    Aggregate (scenario, latency_s, status, bytes) samples into report statistics.
+
+    Status 0 stands for a transport error (timeout, connection reset).
+    """
+    def stats(subset: List[Tuple[str, float, int, int]]) -> Dict[str, Any]:
+        latencies = [s[1] * 1000 for s in subset]
+        errors = sum(1 for s in subset if not 200 <= s[2] < 300)
+        return {
+            "requests": len(subset),
+            "rps": len(subset) / duration if duration else 0.0,
+            "errors": errors,
+            "error_rate": errors / len(subset) if subset else 0.0,
+            "bytes": sum(s[3] for s in subset),
+            "latency_ms": {
+                "mean": sum(latencies) / len(latencies) if latencies else None,
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p99": percentile(latencies, 99),
+                "max": max(latencies) if latencies else None,
+            },
+        }
+
+    report = stats(samples)
+    report["scenarios"] = {
+        name: stats([s for s in samples if s[0] == name])
+        for name in sorted({s[0] for s in samples})
+    }
+    return report
+
+
+def process_rss(pid: int) -> Optional[int]:
+    """
+    Return the resident memory in bytes of a process and all its descendants.
+
+    Reads /proc, so it only works on Linux; returns None elsewhere.
+    """
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return None
+    children: Dict[int, List[int]] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # The command name may contain spaces, the parent pid follows the closing parenthesis
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            for line in (proc / str(current) / "status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+        pending.extend(children.get(current, []))
+    return total
+
+
+class TrafficMix:
+    """
+    Produces request paths and parameters for each scenario from the dataset contents.
+
+    Args:
+        data_dir (str): Directory holding the 'preds_001' run.
+        weights (Dict[str, int]): Relative weight of each scenario.
+        seed (int): Random seed.
+    """
+
+    def __init__(self, data_dir: str, weights: Dict[str, int], seed: int = 0):
+        cells = pl.read_parquet(Path(data_dir) / "preds_001.parquet", columns=["month_id", "priogrid_id", "country_id"])
+        self.months = sorted(cells["month_id"].unique().to_list())
+        self.cells = cells["priogrid_id"].unique().to_list()
+        self.countries = sorted(cells["country_id"].unique().to_list())
+        self.scenarios = list(weights)
+        self.weights = [weights[s] for s in self.scenarios]
+        self.rng = random.Random(seed)
+
+    def next(self) -> Tuple[str, str, Dict[str, Any]]:
+        """
+        Return (scenario, path, params) for the next request.
+        """
+        scenario = self.rng.choices(self.scenarios, self.weights)[0]
+        if scenario == "catalog":
+            endpoint = self.rng.choice(["months", "countries", "metrics", "cells"])
+            params = {"country_id": self.rng.choice(self.countries)} if endpoint == "cells" else {}
+            return scenario, f"{API_PREFIX}/{endpoint}", params
+        if scenario == "cell_series":
+            return scenario, f"{API_PREFIX}/forecasts", {"priogrid_id": self.rng.choice(self.cells)}
+        if scenario == "month_map":
+            return scenario, f"{API_PREFIX}/forecasts", {"month_id": self.rng.choice(self.months), "metrics": "MAP"}
+        if scenario == "multi_country":
+            start = self.rng.randrange(max(1, len(self.months) - 5))
+            return scenario, f"{API_PREFIX}/forecasts", {
+                "country_id": self.rng.sample(self.countries, min(3, len(self.countries))),
+                "month_id": self.months[start:start + 6],
+            }
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(data_dir: str, port: int, workers: int, server_env: Dict[str, str]) -> subprocess.Popen:
+    """
+    Start uvicorn serving main:app from the backend directory on the given dataset.
+    """
+    env = {**os.environ, **server_env, "DATA_PATH": str(Path(data_dir).resolve())}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+async def wait_ready(base_url: str, server: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            try:
+                if (await client.get("/api/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become ready in time")
+
+
+async def drive(
+    base_url: str,
+    mix: TrafficMix,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    server_pid: int,
+    timeout: float,
+) -> Tuple[List[Tuple[str, float, int, int]], List[int], float]:
+    """
+    Send requests from 'concurrency' clients for warmup + duration seconds.
+
+    Returns the samples recorded after the warmup, the server RSS samples and the
+    measured duration.
+    """
+    samples: List[Tuple[str, float, int, int]] = []
+    rss: List[int] = []
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        while time.monotonic() < stop_at:
+            scenario, path, params = mix.next()
+            sent = time.monotonic()
+            try:
+                response = await client.get(path, params=params)
+                status, size = response.status_code, len(response.content)
+            except httpx.HTTPError:
+                status, size = 0, 0
+            if sent >= measure_from:
+                samples.append((scenario, time.monotonic() - sent, status, size))
+
+    async def sample_rss() -> None:
+        while time.monotonic() < stop_at:
+            # Scanning /proc is blocking; keep it off the loop driving the clients
+            value = await asyncio.to_thread(process_rss, server_pid)
+            if value is not None:
+                rss.append(value)
+            await asyncio.sleep(0.5)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        await asyncio.gather(sample_rss(), *(client_loop(client) for _ in range(concurrency)))
+    return samples, rss, time.monotonic() - measure_from
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_pairs(items: List[str], cast=str) -> Dict[str, Any]:
+    pairs = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        pairs[key.strip()] = cast(value.strip())
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the forecast API under uvicorn.")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent client connections")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds excluded from the report")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--port", type=int, default=0, help="server port, 0 picks a free one")
+    parser.add_argument("--data-dir", help="existing dataset directory; generated when omitted")
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--cells", type=int, default=10000)
+    parser.add_argument("--countries", type=int, default=20)
+    parser.add_argument("--mix", default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                        help="scenario weights, e.g. 'catalog=30,cell_series=30,month_map=25,multi_country=15'")
+    parser.add_argument("--server-env", action="append", default=[],
+                        help="KEY=VALUE environment variable for the server, repeatable")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="report file; printed to stdout when omitted")
+    args = parser.parse_args()
+
+    weights = parse_pairs(args.mix.split(","), int)
+    unknown = set(weights) - set(DEFAULT_MIX)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    server_env = parse_pairs(args.server_env)
+
+    with tempfile.TemporaryDirectory(prefix="views_loadtest_") as tmp:
+        data_dir = args.data_dir or str(generate_dataset(
+            tmp, months=args.months, cells=args.cells, countries=args.countries, seed=args.seed
+        ))
+        port = args.port or free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        mix = TrafficMix(data_dir, weights, args.seed)
+
+        server = start_server(data_dir, port, args.workers, server_env)
+        try:
+            asyncio.run(wait_ready(base_url, server, timeout=120))
+            idle_rss = process_rss(server.pid)
+            samples, rss, measured = asyncio.run(drive(
+                base_url, mix, args.concurrency, args.duration, args.warmup, server.pid, args.timeout
+            ))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = {
+        "commit": git_commit(),
+        "config": {
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "dataset": {"path": args.data_dir, "months": len(mix.months), "cells": len(mix.cells),
+                        "countries": len(mix.countries)},
+            "mix": weights,
+            "server_env": server_env,
+        },
+        **summarize(samples, measured),
+        "server_rss_bytes": {
+            "idle": idle_rss,
+            "peak": max(rss) if rss else None,
+            "final": rss[-1] if rss else None,
+        },
+    }
+
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(encoded)
+    else:
+        print(encoded)
+
+
+if __name__ == "__main__":
+    main()
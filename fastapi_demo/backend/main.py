@@ -8,12 +8,22 @@ Attributes:
     app (FastAPI): The FastAPI application instance.
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from application.router_application import router as api_router
+from application.router_application import router as api_router, shutdown
 from fastapi.middleware.cors import CORSMiddleware
 
 
-app = FastAPI(title="VIEWS Forecasts API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Release the router's resources (e.g. sharded query workers) when the server stops.
+    """
+    yield
+    shutdown()
+
+
+app = FastAPI(title="VIEWS Forecasts API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,34 @@
+"""
+Shared pytest fixtures for the backend tests.
+"""
+
+import polars as pl
+import pytest
+
+
+@pytest.fixture
+def write_run():
+    """
+    Return a helper writing a minimal two-cell run to a directory.
+
+    The helper creates '<run>.parquet' and '<run>_90_hdi.parquet' with one month (409),
+    two cells (1 and 2), the given 'pred_ln_sb_best' sample lists and
+    'pred_ln_sb_best_hdi_lower' values.
+    """
+    def _write(path, run, best, hdi_lower):
+        keys = {"month_id": [409, 409], "priogrid_id": [1, 2]}
+        pl.DataFrame({
+            **keys,
+            "country_id": [40, 40],
+            "lat": [0.25, 0.75],
+            "lon": [0.25, 0.25],
+            "row": [1, 1],
+            "col": [1, 2],
+            "pred_ln_sb_best": best,
+        }).write_parquet(path / f"{run}.parquet")
+        pl.DataFrame({
+            **keys,
+            "pred_ln_sb_best_hdi_lower": hdi_lower,
+        }).write_parquet(path / f"{run}_90_hdi.parquet")
+
+    return _write
@@ -0,0 +1,102 @@
+"""
+Tests for request coalescing of identical concurrent queries.
+
+This module verifies:
+- SingleFlight runs one computation per key and shares its result and errors
+- N parallel identical /forecasts and /cells requests invoke the reader once
+
+Usage:
+    Run with pytest to validate request coalescing.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from main import app
+from application import router_application
+from application.single_flight import SingleFlight
+
+client = TestClient(app)
+
+N = 8
+
+
+def slow_counting(fn, calls, delay=0.3):
+    """
+    Wrap fn so that each invocation is counted and takes at least delay seconds.
+    """
+    def wrapper(*args, **kwargs):
+        calls.append(threading.get_ident())
+        time.sleep(delay)
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def test_single_flight_shares_result_and_error():
+    """
+    Test that concurrent callers with the same key share one computation.
+    """
+    flights = SingleFlight()
+    calls = []
+    compute = slow_counting(lambda: object(), calls)
+
+    with ThreadPoolExecutor(max_workers=N) as pool:
+        results = list(pool.map(lambda _: flights.do("key", compute), range(N)))
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flights.stats() == {"executed": 1, "coalesced": N - 1, "in_flight": 0}
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flights.do("key", fail)
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_parallel_identical_forecast_requests_query_once(monkeypatch):
+    """
+    Test that N parallel identical /forecasts requests trigger one reader query.
+    """
+    calls = []
+    monkeypatch.setattr(router_application.reader, "query", slow_counting(router_application.reader.query, calls))
+    monkeypatch.setattr(router_application.forecast_service, "executor", None)
+    before = router_application.flights.stats()["coalesced"]
+
+    params = {"month_id": [409], "metrics": ["MAP"]}
+    with ThreadPoolExecutor(max_workers=N) as pool:
+        responses = list(pool.map(
+            lambda _: client.get("/api/preds_001/pgm/sb/forecasts", params=params), range(N)
+        ))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.content for r in responses}) == 1
+    assert len(calls) == 1
+    assert router_application.flights.stats()["coalesced"] - before == N - 1
+
+
+def test_parallel_identical_cell_requests_query_once(monkeypatch):
+    """
+    Test that N parallel identical /cells requests trigger one reader call.
+    """
+    calls = []
+    monkeypatch.setattr(router_application.reader, "list_cells", slow_counting(router_application.reader.list_cells, calls))
+
+    with ThreadPoolExecutor(max_workers=N) as pool:
+        responses = list(pool.map(
+            lambda _: client.get("/api/preds_001/pgm/sb/cells", params={"country_id": 40}), range(N)
+        ))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len(calls) == 1
+
+    response = client.get("/api/coalescing")
+    assert response.status_code == 200
+    assert response.json()["coalesced"] >= N - 1
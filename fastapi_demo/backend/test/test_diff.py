@@ -0,0 +1,103 @@
+"""
+Tests for the run-to-run diff endpoint and service.
+
+This module verifies:
+- Diffing a run against itself yields zero deltas
+- Threshold filtering with min_change
+- Error handling for unknown runs and metrics
+- Delta computation between two small synthetic runs
+
+Usage:
+    Run with pytest to validate diff behavior.
+"""
+
+import json
+from fastapi.testclient import TestClient
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from main import app
+from business.diff.diff_service import DiffService
+from dataAccess.run_registry import RunRegistry
+
+client = TestClient(app)
+
+
+def test_diff_same_run_is_zero():
+    """
+    Test that comparing a run with itself returns only zero deltas.
+    """
+    params = {"base_run": "preds_001", "month_id": [409], "metrics": ["MAP", "HDI_50_lower"]}
+    response = client.get("/api/preds_001/pgm/sb/diff", params=params)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) > 0
+    for cell in data:
+        assert set(cell["deltas"].keys()) == {"MAP", "HDI_50_lower"}
+        assert all(v in (0, None) for v in cell["deltas"].values())
+
+
+def test_diff_min_change_filters_unchanged_cells():
+    """
+    Test that min_change drops cells whose deltas are all below the threshold.
+    """
+    params = {"base_run": "preds_001", "month_id": [409], "min_change": 0.01}
+    response = client.get("/api/preds_001/pgm/sb/diff", params=params)
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_diff_unknown_run_and_metric():
+    """
+    Test that unknown runs return 404 and unknown metrics return 400.
+    """
+    response = client.get("/api/preds_001/pgm/sb/diff", params={"base_run": "does_not_exist"})
+    assert response.status_code == 404
+
+    params = {"base_run": "preds_001", "metrics": ["not_a_metric"]}
+    response = client.get("/api/preds_001/pgm/sb/diff", params=params)
+    assert response.status_code == 400
+
+
+def test_diff_service_between_runs(tmp_path, write_run):
+    """
+    Test deltas, threshold filtering and caching between two synthetic runs.
+    """
+    write_run(tmp_path, "run_a", [[1.0, 3.0], [1.0]], [0.5, 0.5])
+    write_run(tmp_path, "run_b", [[2.0, 4.0], [1.0]], [0.5, 0.75])
+
+    registry = RunRegistry(base_path=str(tmp_path))
+    assert registry.list_runs() == ["run_a", "run_b"]
+
+    service = DiffService(registry)
+    data = json.loads(service.get_diff("run_b", "run_a", metrics=["MAP", "HDI_50_lower"]))
+    assert [cell["priogrid_id"] for cell in data] == [1, 2]
+    assert data[0]["deltas"] == {"MAP": 1.0, "HDI_50_lower": 0.0}
+    assert data[1]["deltas"] == {"MAP": 0.0, "HDI_50_lower": 0.25}
+
+    changed = json.loads(service.get_diff("run_b", "run_a", metrics=["MAP"], min_change=0.5))
+    assert [cell["priogrid_id"] for cell in changed] == [1]
+
+    service.get_diff("run_b", "run_a", metrics=["MAP"], min_change=0.5)
+    assert service.cache_hits == 1
+
+
+def test_diff_cache_is_bounded_by_size(tmp_path, write_run):
+    """
+    Test that cached diffs are evicted once their total size exceeds the byte budget.
+    """
+    write_run(tmp_path, "run_a", [[1.0, 3.0], [1.0]], [0.5, 0.5])
+    write_run(tmp_path, "run_b", [[2.0, 4.0], [1.0]], [0.5, 0.75])
+    registry = RunRegistry(base_path=str(tmp_path))
+
+    size = len(DiffService(registry).get_diff("run_b", "run_a", metrics=["MAP"]))
+    service = DiffService(registry, cache_bytes=size + 1)
+    service.get_diff("run_b", "run_a", metrics=["MAP"])
+    service.get_diff("run_b", "run_a", metrics=["HDI_50_lower"])
+    assert service._cache_size <= size + 1
+    assert len(service._cache) == 1
+
+    tiny = DiffService(registry, cache_bytes=1)
+    tiny.get_diff("run_b", "run_a", metrics=["MAP"])
+    assert len(tiny._cache) == 0
@@ -0,0 +1,232 @@
+"""
+Tests for asynchronous bulk export jobs.
+
+This module verifies:
+- Export files in every format contain the filtered rows and selected metrics
+- Exports are written month by month with progress recorded per batch
+- Identical export specs reuse the existing job and file
+- Job state is shared through the export directory and claimed with a lock file
+- Status, download and Range support of the export endpoints
+- Error handling for unknown runs, formats and exports
+
+Usage:
+    Run with pytest to validate export behavior.
+"""
+
+import json
+import subprocess
+import polars as pl
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from main import app
+from application import router_application
+from business.export.export_service import ExportService, _process_start
+from dataAccess.run_registry import RunRegistry
+from loadtest.generate_data import generate_dataset
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def service(tmp_path, write_run):
+    """
+    Export service over a synthetic two-cell run, writing to its own directory.
+    """
+    data = tmp_path / "data"
+    data.mkdir()
+    write_run(data, "run_a", [[1.0, 3.0], [2.0]], [0.5, 0.25])
+    return ExportService(RunRegistry(base_path=str(data)), export_path=str(tmp_path / "exports"), batch_size=1)
+
+
+def wait(service, status):
+    service._futures[status["export_id"]].result(timeout=30)
+    return service.get_status(status["export_id"])
+
+
+@pytest.mark.parametrize("file_format,read", [
+    ("parquet", lambda path: pl.read_parquet(path)),
+    ("csv", lambda path: pl.read_csv(path)),
+    ("ndjson", lambda path: pl.read_ndjson(path)),
+])
+def test_export_formats(service, file_format, read):
+    """
+    Test that each format contains the filtered rows with the selected metrics.
+    """
+    status = wait(service, service.submit("run_a", file_format, metrics=["MAP", "HDI_50_lower"]))
+    assert status["status"] == "done"
+    assert status["rows_written"] == status["rows_total"] == 2
+    assert status["progress"] == 1.0
+
+    df = read(service.get_file(status["export_id"]))
+    assert df.columns == ["priogrid_id", "month_id", "country_id", "lat", "lon", "MAP", "HDI_50_lower"]
+    assert df["MAP"].to_list() == [2.0, 2.0]
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "csv", "ndjson"])
+def test_export_streams_months_in_batches(tmp_path, monkeypatch, file_format):
+    """
+    Test that each month is computed separately and that progress is recorded after every batch.
+    """
+    generate_dataset(str(tmp_path / "data"), run="run_b", months=3, cells=4, countries=2)
+    registry = RunRegistry(base_path=str(tmp_path / "data"))
+    service = ExportService(registry, export_path=str(tmp_path / "exports"), batch_size=3)
+    reader = service.registry.get("run_b")
+
+    requested, progress = [], []
+    metric_frame, save = reader.metric_frame, service._save
+
+    def spy_metric_frame(month_ids, *args):
+        requested.append(month_ids)
+        return metric_frame(month_ids, *args)
+
+    def spy_save(job):
+        progress.append((job.status, job.rows_written))
+        save(job)
+
+    monkeypatch.setattr(reader, "metric_frame", spy_metric_frame)
+    monkeypatch.setattr(service, "_save", spy_save)
+
+    status = wait(service, service.submit("run_b", file_format, metrics=["MAP"]))
+    assert status["rows_total"] == status["rows_written"] == 12
+    assert requested == [[409], [410], [411]]
+    assert [p for p in progress if p[0] == "running"] == [("running", n) for n in [0, 3, 4, 7, 8, 11, 12]]
+
+    read = {"parquet": pl.read_parquet, "csv": pl.read_csv, "ndjson": pl.read_ndjson}[file_format]
+    expected = metric_frame(None, None, None, ["MAP"])
+    expected = expected.select(["priogrid_id", "month_id", "country_id", "lat", "lon", "MAP"])
+    assert read(service.get_file(status["export_id"])).equals(expected)
+
+
+def test_export_reuses_identical_spec(service):
+    """
+    Test that identical specs share a job id and that a new service reuses the file on disk.
+    """
+    first = wait(service, service.submit("run_a", "csv", [409], None, None, ["MAP"]))
+    second = service.submit("run_a", "csv", [409, 409], None, None, ["MAP"])
+    assert second["export_id"] == first["export_id"]
+    assert second["status"] == "done"
+
+    other = service.submit("run_a", "csv", [409], None, None, ["HDI_50_lower"])
+    assert other["export_id"] != first["export_id"]
+
+    restarted = ExportService(service.registry, export_path=str(service.export_path))
+    assert restarted.submit("run_a", "csv", [409], None, None, ["MAP"])["status"] == "done"
+
+
+def test_export_state_shared_between_processes(service):
+    """
+    Test that another service on the same directory sees the status and file of a job it did not run.
+    """
+    status = wait(service, service.submit("run_a", "ndjson", metrics=["MAP"]))
+    other = ExportService(service.registry, export_path=str(service.export_path))
+
+    assert other.get_status(status["export_id"]) == status
+    assert other.get_file(status["export_id"]) == service.get_file(status["export_id"])
+    assert not list(service.export_path.glob("*.part")) and not list(service.export_path.glob("*.lock"))
+    with pytest.raises(KeyError):
+        other.get_status("../exports")
+
+
+def test_export_lock_prevents_duplicate_writer(service):
+    """
+    Test that a job locked by a live process is not started again, and that stale locks are taken over.
+    """
+    export_id = wait(service, service.submit("run_a", "csv", metrics=["MAP"]))["export_id"]
+    lock = service.export_path / f"{export_id}.lock"
+
+    def resubmit(lock_text, expected):
+        # Start over from a lock left by another claim, without status or export file
+        for path in service.export_path.glob(f"{export_id}.*"):
+            path.unlink()
+        service._futures.pop(export_id, None)
+        lock.write_text(lock_text)
+        status = service.submit("run_a", "csv", metrics=["MAP"])
+        if expected == "done":
+            status = wait(service, status)
+            assert not lock.exists()
+        assert status["status"] == expected
+
+    def owner(pid, started=None):
+        return json.dumps({"pid": pid, "started": started, "token": "other"})
+
+    other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    try:
+        resubmit(owner(other.pid, _process_start(other.pid)), "pending")
+        assert export_id not in service._futures
+        assert not (service.export_path / f"{export_id}.csv").exists()
+
+        # The pid now belongs to a different process than the one that took the lock
+        resubmit(owner(other.pid, "0"), "done")
+    finally:
+        other.kill()
+        other.wait()
+
+    # The owner has exited
+    resubmit(owner(other.pid), "done")
+    # This process, e.g. restarted with the same pid, without the job running
+    resubmit(owner(os.getpid()), "done")
+    # Left empty by a crash
+    resubmit("", "done")
+
+
+def test_export_interrupted_job_is_restarted(service):
+    """
+    Test that a job whose writer died without finishing is reported as failed and can be resubmitted.
+    """
+    export_id = wait(service, service.submit("run_a", "parquet"))["export_id"]
+    status_path = service.export_path / f"{export_id}.json"
+    state = json.loads(status_path.read_text())
+    status_path.write_text(json.dumps({**state, "status": "running"}))
+    (service.export_path / f"{export_id}.parquet").unlink()
+
+    assert service.get_status(export_id)["status"] == "failed"
+    with pytest.raises(RuntimeError):
+        service.get_file(export_id)
+    assert wait(service, service.submit("run_a", "parquet"))["status"] == "done"
+
+
+def test_export_invalid_requests(service):
+    """
+    Test that unknown runs, formats and metrics are rejected.
+    """
+    with pytest.raises(KeyError):
+        service.submit("missing", "csv")
+    with pytest.raises(ValueError):
+        service.submit("run_a", "xlsx")
+    with pytest.raises(ValueError):
+        service.submit("run_a", "csv", metrics=["not_a_metric"])
+
+
+def test_export_endpoints(tmp_path, monkeypatch):
+    """
+    Test creating, polling and downloading an export over HTTP, including Range requests.
+    """
+    service = ExportService(router_application.run_registry, export_path=str(tmp_path))
+    monkeypatch.setattr(router_application, "export_service", service)
+
+    body = {"run": "preds_001", "format": "ndjson", "month_id": [409], "metrics": ["MAP"]}
+    response = client.post("/api/exports", json=body)
+    assert response.status_code == 202
+    export_id = response.json()["export_id"]
+    service._futures[export_id].result(timeout=30)
+
+    status = client.get(f"/api/exports/{export_id}").json()
+    assert status["status"] == "done"
+
+    download = client.get(f"/api/exports/{export_id}/download")
+    assert download.status_code == 200
+    records = [json.loads(line) for line in download.text.splitlines()]
+    assert len(records) == status["rows_total"]
+    assert all(r["month_id"] == 409 for r in records)
+
+    partial = client.get(f"/api/exports/{export_id}/download", headers={"Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.content == download.content[:10]
+
+    assert client.get("/api/exports/unknown").status_code == 404
+    assert client.post("/api/exports", json={**body, "run": "missing"}).status_code == 404
+    assert client.post("/api/exports", json={**body, "format": "xlsx"}).status_code == 400
@@ -19,6 +19,8 @@ import os
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from main import app
+from business.query.forecast_query_service import ForecastQueryService
+from dataAccess.parquet_reader import ParquetFlatReader
 
 client = TestClient(app)
 
@@ -152,3 +154,124 @@ def test_forecasts_combined_filters_with_no_results():
     assert response.status_code == 200
     data = parse_response(response)
     assert data == []
+
+
+def test_forecasts_top_k_ordered_by_metric():
+    """
+    Test that top_k returns at most K cells per month, ranked by the order_by metric.
+    """
+    params = {"month_id": [409, 410], "order_by": "MAP", "top_k": 3, "metrics": ["MAP"]}
+    response = client.get("/api/preds_001/pgm/sb/forecasts", params=params)
+    assert response.status_code == 200
+    data = parse_response(response)
+    assert len(data) > 0
+
+    for month in (409, 410):
+        values = [cell["values"]["MAP"] for cell in data if cell["month_id"] == month]
+        assert len(values) <= 3
+        assert values == sorted(values, reverse=True)
+
+    # The top cells must match a full scan of the month
+    full = parse_response(client.get(
+        "/api/preds_001/pgm/sb/forecasts", params={"month_id": [409], "metrics": ["MAP"]}
+    ))
+    expected = sorted((c["values"]["MAP"] for c in full if c["values"]["MAP"] is not None), reverse=True)[:3]
+    assert [c["values"]["MAP"] for c in data if c["month_id"] == 409] == expected
+
+
+def test_ranking_without_month_filter_uses_indexed_months(tmp_path, write_run, monkeypatch):
+    """
+    Test that an unfiltered top_k query takes its months from the rank index instead of scanning the frame.
+    """
+    write_run(tmp_path, "run_a", [[1.0, 3.0], [4.0]], [0.5, 0.25])
+    reader = ParquetFlatReader(base_path=str(tmp_path), run="run_a")
+    monkeypatch.setattr(reader, "list_months", lambda: pytest.fail("list_months scans the frame"))
+
+    records = list(reader.query(metrics=["MAP"], order_by="MAP", top_k=1))
+    assert [(r["month_id"], r["priogrid_id"], r["values"]["MAP"]) for r in records] == [(409, 2, 4.0)]
+
+
+def test_forecasts_min_value_threshold():
+    """
+    Test that min_value only returns cells whose ranking metric reaches the threshold.
+    """
+    full = parse_response(client.get(
+        "/api/preds_001/pgm/sb/forecasts", params={"month_id": [409], "metrics": ["HDI_50_upper"]}
+    ))
+    values = sorted(c["values"]["HDI_50_upper"] for c in full if c["values"]["HDI_50_upper"] is not None)
+    threshold = values[len(values) // 2]
+
+    params = {"month_id": [409], "order_by": "HDI_50_upper", "min_value": threshold}
+    response = client.get("/api/preds_001/pgm/sb/forecasts", params=params)
+    assert response.status_code == 200
+    data = parse_response(response)
+    assert len(data) == len([v for v in values if v >= threshold])
+    assert all(cell["values"]["HDI_50_upper"] >= threshold for cell in data)
+
+
+def test_forecasts_invalid_ranking_parameters():
+    """
+    Test that ranking parameters are validated.
+    """
+    response = client.get("/api/preds_001/pgm/sb/forecasts", params={"top_k": 5})
+    assert response.status_code == 400
+
+    response = client.get("/api/preds_001/pgm/sb/forecasts", params={"order_by": "not_a_metric"})
+    assert response.status_code == 400
+
+
+def test_forecasts_columnar_layout_matches_rows():
+    """
+    Test that layout=columnar returns one array per field with the same data as the row layout.
+    """
+    params = {"month_id": [409, 410], "country_id": [40], "metrics": ["MAP", "HDI_90_upper"]}
+    rows = parse_response(client.get("/api/preds_001/pgm/sb/forecasts", params=params))
+    response = client.get("/api/preds_001/pgm/sb/forecasts", params={**params, "layout": "columnar"})
+    assert response.status_code == 200
+    data = response.json()
+
+    assert set(data.keys()) == {"priogrid_id", "month_id", "country_id", "lat", "lon", "MAP", "HDI_90_upper"}
+    assert len(data["priogrid_id"]) == len(rows)
+    for i, cell in enumerate(rows):
+        assert data["priogrid_id"][i] == cell["priogrid_id"]
+        assert data["month_id"][i] == cell["month_id"]
+        assert data["MAP"][i] == cell["values"]["MAP"]
+
+
+def test_forecasts_columnar_dedupe_cells():
+    """
+    Test that dedupe_cells moves static cell attributes to a side table referenced by index.
+    """
+    params = {"month_id": [409, 410], "metrics": ["MAP"], "layout": "columnar", "dedupe_cells": True}
+    response = client.get("/api/preds_001/pgm/sb/forecasts", params=params)
+    assert response.status_code == 200
+    data = response.json()
+
+    assert set(data.keys()) == {"cells", "cell_index", "month_id", "MAP"}
+    cells = data["cells"]
+    assert len(set(cells["priogrid_id"])) == len(cells["priogrid_id"])
+    assert len(cells["priogrid_id"]) < len(data["cell_index"])
+    assert max(data["cell_index"]) == len(cells["priogrid_id"]) - 1
+
+
+def test_forecasts_columnar_empty_result():
+    """
+    Test that an empty columnar result contains empty arrays.
+    """
+    params = {"month_id": [9999], "metrics": ["MAP"], "layout": "columnar"}
+    response = client.get("/api/preds_001/pgm/sb/forecasts", params=params)
+    assert response.status_code == 200
+    assert response.json()["MAP"] == []
+
+
+def test_forecasts_columnar_matches_rows_with_float32(tmp_path, write_run):
+    """
+    Test that both layouts return identical numbers when metrics are stored as Float32.
+    """
+    write_run(tmp_path, "run_a", [[0.0000348940411, 0.1], [1 / 3]], [0.1, 2 / 3])
+    service = ForecastQueryService(ParquetFlatReader(base_path=str(tmp_path), run="run_a", metric_precision="float32"))
+
+    rows = list(service.get_forecasts(metrics=["MAP", "HDI_50_lower"]))
+    columnar = json.loads(service.get_forecasts_columnar(metrics=["MAP", "HDI_50_lower"]))
+    assert columnar["MAP"] == [r["values"]["MAP"] for r in rows]
+    assert columnar["HDI_50_lower"] == [r["values"]["HDI_50_lower"] for r in rows]
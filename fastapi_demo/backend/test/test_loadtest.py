@@ -0,0 +1,48 @@
+"""
+Tests for the load-testing helpers.
+
+This module verifies:
+- The synthetic dataset generator produces files ParquetFlatReader can load
+- Report aggregation of latency samples
+
+Usage:
+    Run with pytest to validate the load-testing helpers.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from dataAccess.parquet_reader import ParquetFlatReader
+from loadtest.generate_data import generate_dataset
+from loadtest.run_loadtest import percentile, summarize
+
+
+def test_generated_dataset_loads(tmp_path):
+    """
+    Test that the generated run has one row per month and cell and exposes every metric.
+    """
+    generate_dataset(str(tmp_path), months=3, cells=50, countries=4, samples=4)
+    reader = ParquetFlatReader(base_path=str(tmp_path))
+
+    assert len(reader.list_months()) == 3
+    assert len(reader.list_country_ids()) == 4
+    assert reader.df.height == 150
+    record = next(reader.query(month_ids=[409]))
+    assert all(record["values"][m] is not None for m in ParquetFlatReader.METRIC_COLS)
+
+
+def test_summarize_latencies_and_errors():
+    """
+    Test percentiles, error rates and per-scenario breakdown of a report.
+    """
+    samples = [("a", i / 1000, 200, 10) for i in range(1, 101)] + [("b", 0.5, 500, 0), ("b", 0.1, 0, 0)]
+    report = summarize(samples, duration=2.0)
+
+    assert report["requests"] == 102
+    assert report["rps"] == 51.0
+    assert report["errors"] == 2
+    assert report["scenarios"]["a"]["error_rate"] == 0.0
+    assert report["scenarios"]["a"]["latency_ms"]["p50"] == 50.5
+    assert report["scenarios"]["b"]["error_rate"] == 1.0
+    assert percentile([], 99) is None
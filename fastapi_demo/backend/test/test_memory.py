@@ -0,0 +1,76 @@
+"""
+Tests for the compact in-memory representation and the memory report.
+
+This module verifies:
+- ID columns are downcast and unused source columns are dropped
+- Float32 metric storage
+- Query results are unchanged by compaction
+- The /memory endpoint
+
+Usage:
+    Run with pytest to validate memory compaction behavior.
+"""
+
+import polars as pl
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from main import app
+from dataAccess.parquet_reader import ParquetFlatReader
+
+client = TestClient(app)
+
+
+def test_compact_reader_schema(tmp_path, write_run):
+    """
+    Test that compaction keeps only base and metric columns with the smallest integer types.
+    """
+    write_run(tmp_path, "run_a", [[1.0, 3.0], [2.0]], [0.5, 0.25])
+    reader = ParquetFlatReader(base_path=str(tmp_path), run="run_a")
+
+    assert reader.df.columns == ParquetFlatReader.BASE_COLS + ParquetFlatReader.METRIC_COLS
+    assert reader.df.schema["month_id"] == pl.UInt16
+    assert reader.df.schema["priogrid_id"] == pl.UInt8
+    assert reader.df.schema["MAP"] == pl.Float64
+
+    report = reader.memory_report()
+    assert report["rows"] == 2
+    assert report["total_bytes"] == report["frame_bytes"] + report["rank_index_bytes"]
+    assert set(report["columns"]) == set(reader.df.columns)
+
+
+def test_compact_reader_matches_uncompacted(tmp_path, write_run):
+    """
+    Test that compacted and uncompacted readers return the same records.
+    """
+    write_run(tmp_path, "run_a", [[1.0, 3.0], None], [0.5, None])
+    compact = list(ParquetFlatReader(base_path=str(tmp_path), run="run_a").query())
+    full = list(ParquetFlatReader(base_path=str(tmp_path), run="run_a", compact=False).query())
+    assert compact == full
+    assert compact[1]["values"]["MAP"] is None
+
+
+def test_float32_precision(tmp_path, write_run):
+    """
+    Test that metrics can be stored as Float32 and that unknown precisions are rejected.
+    """
+    write_run(tmp_path, "run_a", [[1.0, 3.0], [2.0]], [0.5, 0.25])
+    reader = ParquetFlatReader(base_path=str(tmp_path), run="run_a", metric_precision="float32")
+    assert all(reader.df.schema[m] == pl.Float32 for m in ParquetFlatReader.METRIC_COLS)
+
+    with pytest.raises(ValueError):
+        ParquetFlatReader(base_path=str(tmp_path), run="run_a", metric_precision="float16")
+
+
+def test_memory_endpoint():
+    """
+    Test that the memory endpoint reports the loaded runs.
+    """
+    response = client.get("/api/memory")
+    assert response.status_code == 200
+    data = response.json()
+    assert any(run["run"] == "preds_001" for run in data["runs"])
+    assert data["total_bytes"] > 0
@@ -0,0 +1,182 @@
+"""
+Tests for sharded query execution over worker processes.
+
+This module verifies:
+- Sharded results match the in-process reader for month and country partitioning
+- Shards that cannot match the filters are skipped
+- Queries recover from a worker process that died
+
+Usage:
+    Run with pytest to validate sharded execution.
+"""
+
+import json
+import shutil
+import signal
+import tempfile
+import subprocess
+import polars as pl
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from dataAccess.parquet_reader import ParquetFlatReader
+from dataAccess.sharded_executor import ShardedQueryExecutor
+from business.query.forecast_query_service import ForecastQueryService
+
+
+@pytest.fixture
+def reader(tmp_path):
+    """
+    Reader over a synthetic run with 4 months and 3 countries.
+    """
+    keys = [(m, pg, 10 + pg % 3) for m in range(409, 413) for pg in range(1, 7)]
+    pl.DataFrame({
+        "month_id": [m for m, _, _ in keys],
+        "priogrid_id": [pg for _, pg, _ in keys],
+        "country_id": [c for _, _, c in keys],
+        "lat": [pg * 0.5 for _, pg, _ in keys],
+        "lon": [pg * -0.5 for _, pg, _ in keys],
+        "row": [1] * len(keys),
+        "col": [pg for _, pg, _ in keys],
+        "pred_ln_sb_best": [[m / 1000, pg / 10] for m, pg, _ in keys],
+    }).write_parquet(tmp_path / "run_a.parquet")
+    pl.DataFrame({
+        "month_id": [m for m, _, _ in keys],
+        "priogrid_id": [pg for _, pg, _ in keys],
+        "pred_ln_sb_best_hdi_lower": [pg / 7 for _, pg, _ in keys],
+    }).write_parquet(tmp_path / "run_a_90_hdi.parquet")
+    return ParquetFlatReader(base_path=str(tmp_path), run="run_a")
+
+
+def expected(reader, *args):
+    """
+    Records from the in-process reader in the /forecasts layout, sorted by key.
+    """
+    records = [
+        {k: r[k] for k in ["priogrid_id", "month_id", "country_id", "lat", "lon", "values"]}
+        for r in reader.query(*args)
+    ]
+    return sorted(records, key=lambda r: (r["month_id"], r["priogrid_id"]))
+
+
+@pytest.mark.parametrize("partition_by", ["month", "country"])
+def test_sharded_matches_reader(reader, partition_by):
+    """
+    Test that sharded queries return the same records as the reader.
+    """
+    executor = ShardedQueryExecutor(reader, workers=2, partition_by=partition_by)
+    try:
+        for args in [
+            (None, None, None, None),
+            ([410, 411], None, None, ["MAP", "HDI_50_lower"]),
+            (None, [2, 3], [11], ["MAP"]),
+            ([9999], None, None, None),
+        ]:
+            data = json.loads(executor.query_json(*args))
+            data.sort(key=lambda r: (r["month_id"], r["priogrid_id"]))
+            assert data == expected(reader, *args)
+    finally:
+        executor.close()
+
+
+def test_service_sends_only_unranked_queries_to_executor(reader):
+    """
+    Test that the query service serves unranked queries encoded only when an executor is configured.
+    """
+    assert not ForecastQueryService(reader).supports_encoded()
+    executor = ShardedQueryExecutor(reader, workers=1)
+    try:
+        service = ForecastQueryService(reader, executor=executor)
+        assert service.supports_encoded()
+        assert not service.supports_encoded("MAP")
+        assert json.loads(service.get_forecasts_json([409])) == json.loads(executor.query_json([409]))
+    finally:
+        executor.close()
+
+
+def test_sharded_skips_non_matching_shards(reader):
+    """
+    Test that month filters only target the shards holding those months.
+    """
+    executor = ShardedQueryExecutor(reader, workers=2, partition_by="month")
+    try:
+        assert len(executor.shards) == 4
+        assert len(executor._matching_shards([409], None)) == 1
+        assert executor._matching_shards([9999], None) == []
+    finally:
+        executor.close()
+
+
+def test_stale_shard_directories_are_removed(tmp_path):
+    """
+    Test that shard directories of dead processes are removed and live ones are kept.
+    """
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    stale = tmp_path / f"views_shards_{dead.pid}_abc"
+    live = tmp_path / f"views_shards_{os.getpid()}_abc"
+    stale.mkdir()
+    live.mkdir()
+
+    ShardedQueryExecutor.remove_stale_shards(str(tmp_path))
+    assert not stale.exists()
+    assert live.exists()
+
+
+def test_shards_fall_back_to_temp_dir_when_shm_is_full(reader, monkeypatch):
+    """
+    Test that shards are written to the temporary directory when /dev/shm has no room for them.
+    """
+    disk_usage = shutil.disk_usage
+    monkeypatch.setattr(shutil, "disk_usage", lambda path: disk_usage(path)._replace(free=0))
+    executor = ShardedQueryExecutor(reader, workers=1)
+    try:
+        assert os.path.dirname(os.path.dirname(executor.shards[0]["path"])) == tempfile.gettempdir()
+        assert len(json.loads(executor.query_json())) == 24
+    finally:
+        executor.close()
+
+
+def test_close_removes_shards(reader):
+    """
+    Test that close deletes the shard directory and can be called twice.
+    """
+    executor = ShardedQueryExecutor(reader, workers=1)
+    shard_dir = os.path.dirname(executor.shards[0]["path"])
+    executor.close()
+    executor.close()
+    assert not os.path.exists(shard_dir)
+
+
+def test_sharded_recovers_from_dead_worker(reader):
+    """
+    Test that queries keep working after a worker process is killed.
+    """
+    executor = ShardedQueryExecutor(reader, workers=2)
+    try:
+        assert len(json.loads(executor.query_json())) == 24
+        for pid in list(executor._pool._processes):
+            os.kill(pid, signal.SIGKILL)
+        for _ in range(2):
+            data = json.loads(executor.query_json([410], None, None, ["MAP"]))
+            data.sort(key=lambda r: (r["month_id"], r["priogrid_id"]))
+            assert data == expected(reader, [410], None, None, ["MAP"])
+    finally:
+        executor.close()
+
+
+def test_sharded_matches_reader_with_float32(tmp_path, write_run):
+    """
+    Test that Float32 metrics are encoded with the same values as the in-process reader.
+    """
+    write_run(tmp_path, "run_a", [[0.0000348940411, 0.1], [1 / 3]], [0.1, 2 / 3])
+    float32_reader = ParquetFlatReader(base_path=str(tmp_path), run="run_a", metric_precision="float32")
+    executor = ShardedQueryExecutor(float32_reader, workers=1)
+    try:
+        data = json.loads(executor.query_json())
+        data.sort(key=lambda r: (r["month_id"], r["priogrid_id"]))
+        assert data == expected(float32_reader)
+    finally:
+        executor.close()